@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Benchmark cost of sampling sensor values per backend.
+
+Usage: python -m bench.backends [--ticks NUM]
+"""
+import argparse
+import time
+
+from systeminfo.sensors.backend import PsutilBackend, ProcBackend
+
+
+def measure(func, ticks):
+    "Get average time in usec of calling func"
+    start = time.perf_counter_ns()
+    for _ in range(ticks):
+        func()
+    return ( time.perf_counter_ns() - start ) / ticks / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="""Compare per-tick cost of sensor backends.""")
+    parser.add_argument('--ticks', dest='ticks', type=int, default=2000,
+                        help='Number of samples per measurement.')
+    args = parser.parse_args()
+
+    backends = [ PsutilBackend() ]
+    try:
+        backends.append( ProcBackend() )
+    except OSError as e:
+        print("Backend proc not available: {}".format(e))
+
+    calls = ( "cpuLoads", "memory", "diskCounters", "netCounters" )
+    print("{:14s}".format("usec/tick") + "".join( "{:>12s}".format(b.name) for b in backends ))
+    totals = [ 0 ] * len(backends)
+    for call in calls:
+        costs = [ measure( getattr(b, call), args.ticks ) for b in backends ]
+        totals = [ t + c for t, c in zip(totals, costs) ]
+        print("{:14s}".format(call) + "".join( "{:12.1f}".format(c) for c in costs ))
+    print("{:14s}".format("total") + "".join( "{:12.1f}".format(t) for t in totals ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Synthetic host with many cpus, network interfaces, disks, mounts and processes,
+seen by the sensors through a fake /proc and patched psutil.
+"""
+import os
+import random
+import shutil
+import tempfile
+from collections import namedtuple
+
+import psutil
+
+from systeminfo.sensors           import backend
+from systeminfo.sensors           import samplers
+from systeminfo.sensors.proccount import ProcessCounter
+
+
+scputimes  = namedtuple("scputimes",  "user nice system idle iowait irq softirq steal guest guest_nice")
+svmem      = namedtuple("svmem",      "total available percent used free")
+sswap      = namedtuple("sswap",      "total used free percent sin sout")
+sdiskio    = namedtuple("sdiskio",    "read_count write_count read_bytes write_bytes read_time write_time")
+snetio     = namedtuple("snetio",     "bytes_sent bytes_recv packets_sent packets_recv errin errout dropin dropout")
+snicstats  = namedtuple("snicstats",  "isup duplex speed mtu")
+sdiskpart  = namedtuple("sdiskpart",  "device mountpoint fstype opts")
+sdiskusage = namedtuple("sdiskusage", "total used free percent")
+
+MEM_TOTAL  = 512 * 1024**3
+SWAP_TOTAL = 64 * 1024**3
+
+
+class FakeHost(object):
+    """Stand-in for a large host, used as context manager. Writes /proc files of the given
+    number of cpus, network interfaces, disks and mounts into a temporary directory that gets
+    read instead of /proc, and patches psutil to return the same values. Mountpoints are
+    existing directories, processes are empty files named by pid. Counters advance
+    by a pseudo random amount on every call of advance()."""
+
+    def __init__(self, nofCpus=256, nofNics=500, nofDisks=200, nofMounts=5000, nofProcs=50000, seed=1):
+        self._random    = random.Random(seed)
+        self._cpus      = [ [0] * 10 for _ in range(nofCpus) ]
+        self._nics      = { "eth{:03d}".format(i): [0, 0] for i in range(nofNics) }
+        self._disks     = { "disk{:03d}".format(i): [0, 0] for i in range(nofDisks) }
+        self._nofMounts = nofMounts
+        self._pids      = list( range(1, nofProcs+1) )
+        self._root      = None
+        self._mounts    = {} # mountpoint -> device
+        self._patches   = []
+
+    def path(self, procPath):
+        "Get path of fake file for given path within /proc"
+        return os.path.join( self._root, os.path.relpath(procPath, "/proc") )
+
+    def __enter__(self):
+        self._root = tempfile.mkdtemp( prefix="fakehost-" )
+        os.makedirs( self.path("/proc/self") )
+        os.makedirs( self.path("/proc/net") )
+        disks = sorted(self._disks)
+        for i in range(self._nofMounts):
+            mountpoint = os.path.join( self._root, "mnt", "m{:05d}".format(i) )
+            os.makedirs( mountpoint )
+            self._mounts[mountpoint] = "/dev/{}p{}".format( disks[i % len(disks)], i // len(disks) + 1 )
+        self._write( "/proc/filesystems", "nodev\tsysfs\nnodev\tproc\n\text4\n\txfs\n" )
+        self._write( "/proc/self/mountinfo", "".join(
+            "{} 1 8:{} / {} rw,relatime shared:1 - ext4 {} rw\n".format( i+2, i, mountpoint, device )
+            for i, (mountpoint, device) in enumerate( self._mounts.items() ) ) )
+        procDir = self.path("/proc")
+        for pid in self._pids:
+            open( os.path.join(procDir, str(pid)), "w" ).close()
+        self._write( "/proc/self/stat", "1 (python) R\n" )
+        self.advance()
+
+        host = self
+        class FakeProcFile(backend.ProcFile):
+            def __init__(self, path, size=4096):
+                super().__init__( host.path(path), size )
+        self._patch( backend, "ProcFile", FakeProcFile )
+        self._patch( samplers, "ProcFile", FakeProcFile )
+        self._patch( samplers.MountTable, "FILESYSTEMS", self.path("/proc/filesystems") )
+        self._patch( ProcessCounter, "PROC", procDir )
+        self._patch( psutil, "cpu_times", self._cpuTimes )
+        self._patch( psutil, "virtual_memory", self._virtualMemory )
+        self._patch( psutil, "swap_memory", self._swapMemory )
+        self._patch( psutil, "disk_io_counters", self._diskIoCounters )
+        self._patch( psutil, "net_io_counters", self._netIoCounters )
+        self._patch( psutil, "net_if_stats", self._netIfStats )
+        self._patch( psutil, "disk_partitions", self._diskPartitions )
+        self._patch( psutil, "disk_usage", self._diskUsage )
+        self._patch( psutil, "pids", lambda: list(self._pids) )
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for obj, name, value in reversed(self._patches):
+            setattr( obj, name, value )
+        self._patches = []
+        shutil.rmtree( self._root, ignore_errors=True )
+        return False
+
+    def _patch(self, obj, name, value):
+        self._patches.append( ( obj, name, getattr(obj, name) ) )
+        setattr( obj, name, value )
+
+    def _write(self, procPath, text):
+        with open( self.path(procPath), "w" ) as f:
+            f.write( text )
+
+    def advance(self):
+        "Advance all counters and rewrite the /proc files"
+        rnd = self._random
+        for times in self._cpus:
+            busy = rnd.randint(0, 20)
+            system = rnd.randint(0, busy)
+            times[0] += busy - system
+            times[2] += system
+            times[3] += 20 - busy
+        for counters in list(self._nics.values()) + list(self._disks.values()):
+            counters[0] += rnd.randint(0, 1 << 20)
+            counters[1] += rnd.randint(0, 1 << 20)
+        self._write( "/proc/stat",
+                     "cpu  {}\n".format( " ".join( str(sum(col)) for col in zip(*self._cpus) ) ) +
+                     "".join( "cpu{} {}\n".format( i, " ".join(map(str, times)) ) for i, times in enumerate(self._cpus) ) +
+                     "intr 0\nctxt 0\n" )
+        self._write( "/proc/loadavg", "0.20 0.18 0.12 1/{} 11206\n".format( len(self._pids) ) )
+        self._write( "/proc/meminfo",
+                     "MemTotal: {} kB\nMemFree: {} kB\nMemAvailable: {} kB\nBuffers: 0 kB\nCached: 0 kB\n"
+                     "SwapTotal: {} kB\nSwapFree: {} kB\n".format( MEM_TOTAL // 1024, MEM_TOTAL // 4096,
+                                                                    MEM_TOTAL // 2048, SWAP_TOTAL // 1024, SWAP_TOTAL // 2048 ) )
+        self._write( "/proc/diskstats", "".join(
+            "   8 {:7d} {} 1 0 {} 1 1 0 {} 1 0 1 1\n".format( i, name, r // backend.ProcBackend.SECTOR_SIZE,
+                                                           w // backend.ProcBackend.SECTOR_SIZE )
+            for i, (name, (r, w)) in enumerate( self._disks.items() ) ) )
+        self._write( "/proc/net/dev",
+                     "Inter-|   Receive |  Transmit\n face |bytes packets|bytes packets\n" + "".join(
+                     "{:>6s}: {} 1 0 0 0 0 0 0 {} 1 0 0 0 0 0 0\n".format( name, r, s ) for name, (r, s) in self._nics.items() ) )
+
+    def _cpuTimes(self, percpu=False):
+        times = [ scputimes( *[ t / 100 for t in cpu ] ) for cpu in self._cpus ]
+        return times if percpu else scputimes( *[ sum(col) for col in zip(*times) ] )
+
+    def _virtualMemory(self):
+        return svmem( MEM_TOTAL, MEM_TOTAL // 2, 50.0, MEM_TOTAL // 2, MEM_TOTAL // 4 )
+
+    def _swapMemory(self):
+        return sswap( SWAP_TOTAL, SWAP_TOTAL // 2, SWAP_TOTAL // 2, 50.0, 0, 0 )
+
+    def _diskIoCounters(self, perdisk=False):
+        return { name: sdiskio( 1, 1, r, w, 1, 1 ) for name, (r, w) in self._disks.items() }
+
+    def _netIoCounters(self, pernic=False):
+        return { name: snetio( s, r, 1, 1, 0, 0, 0, 0 ) for name, (r, s) in self._nics.items() }
+
+    def _netIfStats(self):
+        return { name: snicstats( True, 2, 10000, 1500 ) for name in self._nics }
+
+    def _diskPartitions(self, all=False):
+        return [ sdiskpart( device, mountpoint, "ext4", "rw" ) for mountpoint, device in self._mounts.items() ]
+
+    def _diskUsage(self, path):
+        return sdiskusage( 1 << 40, 1 << 39, 1 << 39, 50.0 )
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Benchmark the sensor pipeline of the GUI on a synthetic large host.
+
+Drives the sensor singletons in their worker thread and the info objects and histories
+in the GUI thread, like the QML of the main window would use them, and reports per tick
+the cost of every trigger, the time spent in the GUI thread, the number of emitted
+signals and the allocated memory. Results can be saved as baseline, a later check
+fails when a result got worse than its baseline by more than the tolerance.
+
+bench/baselines has a baseline of the default configuration, holding only the results that
+don't depend on the machine, i.e. signals and memory, saved with --save --portable. Timings
+depend on the machine, --check only compares them after --save on the machine that runs it,
+e.g. before making a change.
+
+Usage: python -m bench.pipeline [--ticks NUM] [--backend NAME] [--proc-source NAME] [--save [--portable] | --check]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault( "QT_QPA_PLATFORM", "offscreen" )
+
+from PyQt5.QtCore import QObject, QMetaObject, QMetaMethod, Qt, pyqtSlot
+from PyQt5.QtGui  import QGuiApplication
+
+from bench.fakehost               import FakeHost
+from systeminfo.sensors           import backend
+from systeminfo.sensors           import clock
+from systeminfo.sensors           import schedule
+from systeminfo.sensors.proccount import ProcessCounter
+
+
+BASELINES     = os.path.join( os.path.dirname(os.path.abspath(__file__)), "baselines" )
+TOLERANCE     = 0.25 # relative increase of a result over its baseline that counts as regression
+SLACK         = { "usec": 50, "signals": 1, "KiB": 64, "blocks": 100 } # absolute increase by unit that is ignored
+MACHINE_UNITS = ( "usec", ) # units of results that depend on the machine, not saved in portable baselines
+
+
+class Driver(QObject):
+    """Emits all triggers of a tick in the worker thread, measuring the time spent
+    in the slots of every trigger, instead of the timer of TriggerSingleton"""
+
+    def __init__(self, trigger):
+        super().__init__()
+        self._trigger = trigger
+        self.costs    = { t: 0 for t in schedule.ALL_TRIGGERS + ("snapshot",) } # nsec of most recent tick
+
+    @pyqtSlot()
+    def stopTimer(self):
+        self._trigger._refreshTimer.stop()
+
+    @pyqtSlot()
+    def tick(self):
+        for t in schedule.ALL_TRIGGERS:
+            start = time.perf_counter_ns()
+            self._trigger.triggered.emit( t )
+            self.costs[t] = time.perf_counter_ns() - start
+        start = time.perf_counter_ns()
+        self._trigger.tickFinished.emit()
+        self.costs["snapshot"] = time.perf_counter_ns() - start
+
+
+class Pipeline(object):
+    "Sensor singletons, info objects and histories of the GUI, created for the current host"
+
+    def __init__(self, app):
+        # import sensors only now, so their samplers get created for the fake host
+        from systeminfo.toolbox         import WorkerSingleton
+        from systeminfo.sensors.cpu     import CpuInfo, CpuLoadsModel
+        from systeminfo.sensors.mem     import MemInfo
+        from systeminfo.sensors.disk    import DisksInfo, DiskInfo, PartitionsInfo, PartitionInfo
+        from systeminfo.sensors.network import NetworkInterfacesInfo, NetworkInterfaceInfo
+        from systeminfo.sensors.hub     import SensorHub
+        from systeminfo.sensors.trigger import TriggerSingleton
+
+        self._app    = app
+        self._hub    = SensorHub.get()
+        self._driver = Driver( TriggerSingleton.get() )
+        WorkerSingleton.get().registerSingleton( self._driver )
+        QMetaObject.invokeMethod( self._driver, "stopTimer", Qt.BlockingQueuedConnection )
+
+        cpuInfo    = CpuInfo()
+        memInfo    = MemInfo()
+        self.infos = [ cpuInfo, memInfo, CpuLoadsModel.get(), DisksInfo(), NetworkInterfacesInfo(), PartitionsInfo() ]
+        self.histories = [ cpuInfo.cpuHistory, cpuInfo.procHistory, memInfo.history ]
+        self.tick()
+        self.tick() # rates of disks and interfaces need two samples
+
+        # one info object per device, like the repeaters of the main window
+        for name in [""] + self._hub.disks:
+            info = DiskInfo()
+            info.disk = name
+            self.infos.append( info )
+            self.histories.append( info.history )
+        for name in [""] + self._hub.interfaces:
+            info = NetworkInterfaceInfo()
+            info.name = name
+            self.infos.append( info )
+            self.histories.append( info.history )
+        for path in self._hub.partitions:
+            info = PartitionInfo()
+            info.path = path
+            self.infos.append( info )
+
+        self.nofSignals = 0
+        self._counted   = False
+
+    def countSignals(self):
+        "Count emissions of every signal of hub, info objects and histories from now on"
+        if self._counted:
+            return
+        self._counted = True
+        for obj in [ self._hub ] + self.infos + self.histories:
+            meta  = obj.metaObject()
+            names = { bytes( meta.method(i).name() ).decode() for i in range(meta.methodCount())
+                      if meta.method(i).methodType() == QMetaMethod.Signal }
+            for name in names - { "destroyed", "objectNameChanged" }:
+                getattr( obj, name ).connect( self._onSignal )
+
+    def _onSignal(self, *args):
+        self.nofSignals += 1
+
+    def tick(self):
+        """Sample all sensors in worker thread and distribute their snapshot in GUI thread,
+        get tuple of nsec per trigger in worker thread and nsec in GUI thread"""
+        QMetaObject.invokeMethod( self._driver, "tick", Qt.BlockingQueuedConnection )
+        start = time.perf_counter_ns()
+        self._app.processEvents()
+        return dict(self._driver.costs), time.perf_counter_ns() - start
+
+    def paint(self, width=300):
+        "Fetch samples of every history like a graph of given width, get nsec spent"
+        since = clock.wallTime() - 60
+        start = time.perf_counter_ns()
+        for history in self.histories:
+            history.samples( since, width )
+        return time.perf_counter_ns() - start
+
+
+def run(pipeline, host, ticks):
+    "Get dict of results by name, as tuple of mean value per tick and unit"
+    worker  = { t: [] for t in pipeline._driver.costs }
+    gui     = []
+    paint   = []
+    for _ in range(ticks):
+        host.advance()
+        costs, guiCost = pipeline.tick()
+        for t, cost in costs.items():
+            worker[t].append( cost / 1000 )
+        gui.append( guiCost / 1000 )
+        paint.append( pipeline.paint() / 1000 )
+
+    # second pass, as counting signals and tracing allocations distorts timing
+    pipeline.countSignals()
+    pipeline.nofSignals = 0
+    allocs = []
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    for _ in range(ticks):
+        host.advance()
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        pipeline.tick()
+        pipeline.paint()
+        allocs.append( ( tracemalloc.get_traced_memory()[1] - current ) / 1024 )
+    blocks = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+
+    results = { "worker.{}".format(t): ( statistics.mean(costs), "usec" ) for t, costs in worker.items() }
+    results["worker.total"]   = ( sum( r[0] for r in results.values() ), "usec" )
+    results["gui"]            = ( statistics.mean(gui), "usec" )
+    results["paint"]          = ( statistics.mean(paint), "usec" )
+    results["signals"]        = ( pipeline.nofSignals / ticks, "signals" )
+    results["allocPeak"]      = ( statistics.mean(allocs), "KiB" )
+    results["retainedBlocks"] = ( blocks / ticks, "blocks" )
+    return results
+
+
+def regressions(results, baseline):
+    """Get list of names of results that got worse than their baseline by more than tolerance and slack,
+    skipping results without baseline, e.g. timings of a portable baseline"""
+    worse = []
+    for name, (value, unit) in sorted(results.items()):
+        if name not in baseline:
+            continue
+        reference = baseline[name][0]
+        if value > reference * (1 + TOLERANCE) and value - reference > SLACK.get(unit, 0):
+            worse.append( name )
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="""Measure per-tick cost of the sensor pipeline on a synthetic large host.""")
+    parser.add_argument('--ticks', dest='ticks', type=int, default=20,
+                        help='Number of measured ticks.')
+    parser.add_argument('--backend', dest='backend', choices=backend.BACKENDS[1:], default="proc",
+                        help='Source of sensor values.')
+    parser.add_argument('--proc-source', dest='procSource', choices=ProcessCounter.SOURCES, default="auto",
+                        help='Source for number of processes.')
+    parser.add_argument('--cpus', dest='cpus', type=int, default=256)
+    parser.add_argument('--nics', dest='nics', type=int, default=500)
+    parser.add_argument('--disks', dest='disks', type=int, default=200)
+    parser.add_argument('--mounts', dest='mounts', type=int, default=5000)
+    parser.add_argument('--procs', dest='procs', type=int, default=50000)
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--save', dest='save', action="store_true",
+                        help='Save results as baseline.')
+    action.add_argument('--check', dest='check', action="store_true",
+                        help='Compare results with saved baseline, fail when one got worse by more than {:.0%}.'.format(TOLERANCE))
+    parser.add_argument('--portable', dest='portable', action="store_true",
+                        help='Only save results that do not depend on the machine, e.g. to commit the baseline.')
+    args = parser.parse_args()
+    if args.portable and not args.save:
+        parser.error("--portable requires --save")
+
+    backend.defaultBackend       = args.backend
+    ProcessCounter.defaultSource = args.procSource
+    app = QGuiApplication([])
+    with FakeHost( args.cpus, args.nics, args.disks, args.mounts, args.procs ) as host:
+        pipeline = Pipeline( app )
+        results  = run( pipeline, host, args.ticks )
+
+    baselinePath = os.path.join( BASELINES, "pipeline-{}-{}-{}-{}-{}-{}-{}.json".format(
+                                 args.backend, args.procSource, args.cpus, args.nics, args.disks, args.mounts, args.procs ) )
+    baseline = {}
+    if os.path.isfile(baselinePath):
+        with open(baselinePath) as f:
+            baseline = json.load(f)
+
+    print("{:20s}{:>12s}{:>12s}".format("per tick", "result", "baseline"))
+    for name, (value, unit) in sorted(results.items()):
+        reference = "{:12.1f}".format( baseline[name][0] ) if name in baseline else "{:>12s}".format("-")
+        print("{:20s}{:12.1f}{} {}".format(name, value, reference, unit))
+
+    if args.save:
+        if args.portable:
+            results = { name: result for name, result in results.items() if result[1] not in MACHINE_UNITS }
+        os.makedirs( BASELINES, exist_ok=True )
+        with open(baselinePath, "w") as f:
+            json.dump( results, f, indent=2, sort_keys=True )
+        print("Saved baseline {}".format(baselinePath))
+    elif args.check:
+        if not baseline:
+            print("No baseline {}, save one with --save".format(baselinePath))
+            return 2
+        worse = regressions( results, baseline )
+        if worse:
+            print("Regression of {}".format(", ".join(worse)))
+            return 1
+        print("No regression")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit( main() )
@@ -30,6 +30,9 @@ Item {
     // render data of one second duration within given pixels
     property real pixelPerSec: 10
 
+    // seconds of data shown within the width of the graph, instead of using pixelPerSec when not zero
+    property real duration: 0
+
     property int lineWidth:       2
     property var lineColors:      ["red"]
     property color fillColor:     "black"
@@ -42,19 +45,34 @@ Item {
     property bool showMinLabel:   true
 
     signal rerender()
+    signal clicked()
 
     onLineWidthChanged:  theCanvas.requestPaint()
     onLineColorsChanged: theCanvas.requestPaint()
     onFillColorChanged:  theCanvas.requestPaint()
     onRerender:          theCanvas.requestPaint()
 
-    onWidthChanged: theHistory.model.duration = Math.ceil( theCanvas.xDuration ) * 1.1
+    MouseArea {
+        anchors.fill: parent
+        onClicked:    theHistory.clicked()
+    }
+
+    Text {
+        anchors.left:       parent.left
+        anchors.bottom:     parent.bottom
+        anchors.leftMargin: 2
+        visible:            theHistory.duration > 0
+        text:               theHistory.duration >= 86400 ? (theHistory.duration / 86400) + " d" : (theHistory.duration / 3600) + " h"
+        color:              "white"
+        font.pixelSize:     10
+        z:                  1
+    }
 
     Canvas {
         id: theCanvas
         anchors.fill: parent
         renderTarget: Canvas.Image
-        property real xDuration: ( width / theHistory.pixelPerSec )
+        property real xDuration: theHistory.duration > 0 ? theHistory.duration : ( width / theHistory.pixelPerSec )
         property real xMin
         property real xMax
         property real yMin
@@ -63,6 +81,11 @@ Item {
         property string yMinText: getAxisTxtForY(yMin)
         property string yMaxText: getAxisTxtForY(yMax)
 
+        onXDurationChanged: {
+            theHistory.model.duration = Math.ceil( xDuration ) * 1.1
+            requestPaint()
+        }
+
         Binding {
             target:   theCanvas
             property: "yMin"
@@ -123,51 +146,39 @@ Item {
             return y_
         }
 
-        function getXData(row) {
-            return theHistory.model.data( theHistory.model.index(row,0) )
-        }
-
-        function getYData(row,idx) {
-            return theHistory.model.data( theHistory.model.index(row,1+idx) )
-        }
-
         function updateYRange(y) {
             yMin = theHistory.autoYRangeZero ? 0 : Math.min(yMin,getAxisValueForY(y,true))
             yMax = Math.max(yMax,getAxisValueForY(y,false))
         }
 
         onPaint: {
+            profiler.begin("HistoryGraph.paint")
             var ctx = getContext("2d")
             ctx.fillStyle = theHistory.fillColor
             ctx.fillRect( 0, 0, width, height )
 
-            var x, y, x_, y_;
-            var nofRows = theHistory.model.rowCount()
-            var nofSets = theHistory.model.columnCount()-1
-            if( !nofRows )
-                return
-
-            // auto scale y-axis from current history data
+            // fetch all history data of visible time range at once
             xMax = new Date().getTime() / 1000 // convert ms since epoch to secs
             xMin = xMax - xDuration
+            var samples = theHistory.model.samples(xMin,width)
+            var xs      = samples.x
+            var nofRows = xs.length
+            var nofSets = samples.y.length
+            if( !nofRows ) {
+                profiler.end("HistoryGraph.paint")
+                return
+            }
+
+            // auto scale y-axis from range of current history data
+            var setIdx
             if( theHistory.autoYRange ) {
-                var rangeFound = false
+                var mins = theHistory.model.minimums
+                var maxs = theHistory.model.maximums
                 yMin = theHistory.autoYRangeZero ? 0 : 1e10
                 yMax = -1e10
-                for( var rowIdx=0; rowIdx<nofRows; rowIdx++ ) {
-                    x = getXData(rowIdx)
-                    if( xMin <= x && x <= xMax ) {
-                        for( var setIdx=0; setIdx<nofSets; setIdx++ ) {
-                            rangeFound = true
-                            updateYRange( getYData(rowIdx,setIdx) )
-                        }
-                    }
-                }
-                if( !rangeFound ) {
-                    // fallback to last known values from history
-                    for( var setIdx=0; setIdx<nofSets; setIdx++ ) {
-                        updateYRange( getYData(nofRows-1,setIdx) )
-                    }
+                for( setIdx=0; setIdx<nofSets; setIdx++ ) {
+                    updateYRange( mins[setIdx] )
+                    updateYRange( maxs[setIdx] )
                 }
                 if( yMin == yMax ) {
                     yMin = Math.floor(yMin*0.95)
@@ -176,23 +187,20 @@ Item {
             }
 
             // render the history lines
-            var pt, pt_
+            var pt, pt_, ys
             for( setIdx=0; setIdx<nofSets; setIdx++ ) {
+                ys = samples.y[setIdx]
                 ctx.save()
                 ctx.beginPath()
                 ctx.lineJoin    = "round"
                 ctx.strokeStyle = theHistory.lineColors[setIdx]
                 ctx.fillStyle   = theHistory.fillColor
                 ctx.lineWidth   = theHistory.lineWidth
-                x = theHistory.model.data( theHistory.model.index(0,0) )
-                y = theHistory.model.data( theHistory.model.index(0,setIdx+1) )
-                pt = xy2pt(x,y)
+                pt = xy2pt(xs[0],ys[0])
                 ctx.moveTo( pt.x, pt.y )
-                for( rowIdx=1; rowIdx<nofRows; rowIdx++ ) {
-                    x = theHistory.model.data( theHistory.model.index(rowIdx,0) )
-                    y = theHistory.model.data( theHistory.model.index(rowIdx,setIdx+1) )
+                for( var rowIdx=1; rowIdx<nofRows; rowIdx++ ) {
                     pt_ = pt
-                    pt = xy2pt(x,y)
+                    pt = xy2pt(xs[rowIdx],ys[rowIdx])
                     if( theHistory.discrete ) {
                         ctx.lineTo( pt.x, pt_.y )
                         ctx.lineTo( pt.x, pt.y )
@@ -217,6 +225,7 @@ Item {
                 ctx.strokeText( theCanvas.yMaxText, width - ctx.measureText(theCanvas.yMaxText).width, fontPxSize )
             }
             ctx.restore()
+            profiler.end("HistoryGraph.paint")
         }
     }
 }
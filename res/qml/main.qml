@@ -25,6 +25,15 @@ Rectangle {
     color:        "silver"
 
     property real barHeight: 16
+    property int maxCpuRows: 16 // show more CPUs by scrolling the list
+    property bool showCpuHeatmap: false // show load of every cpu over time instead of current loads
+    property var graphDurations: historyRecorded ? [0, 3600, 86400, 604800] : [0] // seconds shown by history graphs, 0 for 10 pixels per sec
+    property int graphDurationIdx: 0
+
+    // show next duration in all history graphs, longer durations need a recorded history
+    function nextGraphDuration() {
+        graphDurationIdx = (graphDurationIdx + 1) % graphDurations.length
+    }
 
     ColumnLayout {
         anchors.fill: parent
@@ -36,10 +45,16 @@ Rectangle {
             label:                  "CPU"
             Layout.fillWidth:       true
             Layout.preferredHeight: root.barHeight
+            MouseArea {
+                anchors.fill: parent
+                onClicked:    root.showCpuHeatmap = !root.showCpuHeatmap
+            }
         }
 
         HistoryGraph {
             id: theCpuHistory
+            duration:          root.graphDurations[root.graphDurationIdx]
+            onClicked:         root.nextGraphDuration()
             Layout.fillWidth:  true
             Layout.fillHeight: true
             model:             cpuInfo.cpuHistory
@@ -56,21 +71,31 @@ Rectangle {
             Layout.preferredHeight: 4
         }
 
-        Repeater {
-            model: cpuInfo.nofCpu
-            PercentSensor {
-                id: theCpuSensor
-                percent:                curCpuInfo.percent
-                showValue:              false
-                Layout.fillWidth:       true
-                Layout.preferredHeight: root.barHeight/2
-                CpuInfo {
-                    id: curCpuInfo
-                    cpu: index+1
-                }
+        ListView {
+            id: theCpuList
+            visible:                !root.showCpuHeatmap
+            Layout.fillWidth:       true
+            Layout.preferredHeight: Math.min( count, root.maxCpuRows ) * root.barHeight/2
+            model:                  cpuInfo.loads
+            clip:                   true
+            interactive:            contentHeight > height
+            boundsBehavior:         Flickable.StopAtBounds
+            delegate: PercentSensor {
+                percent:   model.percent
+                showValue: false
+                width:     ListView.view.width
+                height:    root.barHeight/2
             }
         }
 
+        CpuHeatmap {
+            id: theCpuHeatmap
+            visible:                root.showCpuHeatmap
+            Layout.fillWidth:       true
+            Layout.preferredHeight: root.maxCpuRows * root.barHeight/2
+            duration:               60
+        }
+
         Item {
             Layout.fillWidth:       true
             Layout.preferredHeight: 4
@@ -78,6 +103,8 @@ Rectangle {
 
         HistoryGraph {
             id: theProcHistory
+            duration:          root.graphDurations[root.graphDurationIdx]
+            onClicked:         root.nextGraphDuration()
             Layout.fillWidth:  true
             Layout.fillHeight: true
             model:             cpuInfo.procHistory
@@ -123,6 +150,8 @@ Rectangle {
 
         HistoryGraph {
             id: theMemHistory
+            duration:          root.graphDurations[root.graphDurationIdx]
+            onClicked:         root.nextGraphDuration()
             Layout.fillWidth:  true
             Layout.fillHeight: true
             model:             memInfo.history
@@ -220,6 +249,8 @@ Rectangle {
 
         HistoryGraph {
             id: theNetIoHistory
+            duration:          root.graphDurations[root.graphDurationIdx]
+            onClicked:         root.nextGraphDuration()
             Layout.fillWidth:  true
             Layout.fillHeight: true
             model:             netInfoAll.history
@@ -326,6 +357,8 @@ Rectangle {
 
         HistoryGraph {
             id: theDiskIoHistory
+            duration:          root.graphDurations[root.graphDurationIdx]
+            onClicked:         root.nextGraphDuration()
             Layout.fillWidth:  true
             Layout.fillHeight: true
             model:             diskInfoAll.history
@@ -407,4 +440,24 @@ Rectangle {
         property bool highlight: false
         onTriggered: highlight = !highlight
     }
+
+    // measured spans, only shown while profiling
+    Rectangle {
+        visible:        profiler.enabled
+        anchors.left:   parent.left
+        anchors.right:  parent.right
+        anchors.bottom: parent.bottom
+        height:         theProfileText.contentHeight + 4
+        color:          "#c0000000"
+
+        Text {
+            id: theProfileText
+            anchors.fill:    parent
+            anchors.margins: 2
+            color:           "white"
+            font.family:     "monospace"
+            font.pixelSize:  9
+            text:            profiler.text
+        }
+    }
 }
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Collect system info without GUI and write it as records in JSON lines format.
+"""
+import json
+import logging
+import sys
+
+from systeminfo.sensors.collector import Collector
+from systeminfo.sensors.export    import MetricsExporter
+from systeminfo.sensors.store     import HistoryStore
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def run_headless(intervals=None, path=None, count=None, storePath=None, exportAddress=None):
+    """Collect sensors using given msec between triggers by trigger identifier and write one
+    JSON record per snapshot to file at given path or stdout, until given number of records was written.
+    Snapshots get recorded in history store at given directory too, if any, and latest values
+    get served as metrics at given address, if any."""
+    store = None
+    if storePath:
+        try:
+            store = HistoryStore( storePath )
+        except OSError as e:
+            LOGGER.error("Failed to open history store: {}".format(e))
+            return 1
+    exporter = None
+    if exportAddress:
+        exporter = MetricsExporter()
+        try:
+            exporter.serve( exportAddress )
+        except OSError as e:
+            LOGGER.error("Failed to serve metrics at {}: {}".format(exportAddress, e))
+            if store is not None:
+                store.close()
+            return 1
+    collector = Collector( intervals )
+    out = open( path, "a", encoding="utf-8" ) if path else sys.stdout
+
+    def write(snapshot):
+        out.write( json.dumps( snapshot.toRecord(), separators=(",",":") ) )
+        out.write( "\n" )
+        out.flush()
+        if store is not None:
+            try:
+                store.pushSnapshot( snapshot )
+            except OSError as e:
+                LOGGER.error("Failed to record snapshot: {}".format(e))
+        if exporter is not None:
+            exporter.push( snapshot )
+
+    LOGGER.info("Collecting sensors to {}".format(path or "stdout"))
+    try:
+        collector.run( write, count )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if store is not None:
+            store.close()
+        if exporter is not None:
+            exporter.close()
+    return 0
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Write log messages to a file from a thread of its own, so a slow disk never blocks the
+threads that log, e.g. the worker thread sampling the sensors.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+
+QUEUE_SIZE  = 10000            # messages waiting to be written, more get dropped
+MAX_BYTES   = 10 * 1024 * 1024 # size of log file that gets rotated
+NOF_BACKUPS = 3                # rotated log files that get kept
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Puts messages into a bounded queue without ever waiting, dropping them while the queue
+    is full. The number of dropped messages gets logged as soon as the queue accepts again."""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped   = 0 # total number of dropped messages
+        self._reported = 0 # number of dropped messages already logged
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait( record )
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped != self._reported:
+            self._reportDropped()
+
+    def _reportDropped(self):
+        dropped = self.dropped - self._reported
+        record = logging.LogRecord( __name__, logging.WARNING, __file__, 0,
+                                    "Dropped {} log messages, {} in total".format(dropped,self.dropped), None, None )
+        try:
+            self.queue.put_nowait( record )
+        except queue.Full:
+            return
+        self._reported += dropped
+
+
+class QueuedFileLog(object):
+    "Log file rotated by size, written by a listener thread that takes messages from a bounded queue"
+
+    def __init__(self, path, level=logging.DEBUG, maxBytes=MAX_BYTES, nofBackups=NOF_BACKUPS, queueSize=QUEUE_SIZE):
+        fileHandler = logging.handlers.RotatingFileHandler( path, maxBytes=maxBytes, backupCount=nofBackups, encoding="utf-8" )
+        fileHandler.setFormatter( logging.Formatter("%(asctime)s %(levelname)s %(pathname)s(%(lineno)d): %(message)s") )
+        if os.path.getsize(path):
+            fileHandler.doRollover() # start with an empty file, keeping log of previous run
+        self.handler = DroppingQueueHandler( queue.Queue(queueSize) )
+        self.handler.setLevel( level )
+        self._listener = logging.handlers.QueueListener( self.handler.queue, fileHandler )
+        self._listener.start()
+
+    @property
+    def dropped(self):
+        "Get number of dropped messages"
+        return self.handler.dropped
+
+    def stop(self):
+        "Write all queued messages and stop the listener thread"
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener.handlers[0].close()
+            self._listener = None
+
+
+def attach(logger, path, **kwargs):
+    "Log messages of given logger to file at given path, until exit of interpreter. Get the QueuedFileLog."
+    log = QueuedFileLog( path, **kwargs )
+    logger.addHandler( log.handler )
+    atexit.register( log.stop )
+    return log
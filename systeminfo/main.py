@@ -30,7 +30,14 @@ import sys
 
 import psutil
 
-from systeminfo.ui.mainwindow import run_gui
+from systeminfo                   import logfile
+from systeminfo                   import profiling
+from systeminfo.sensors           import backend
+from systeminfo.sensors           import export
+from systeminfo.sensors           import rules
+from systeminfo.sensors           import schedule
+from systeminfo.sensors           import trace
+from systeminfo.sensors.proccount import ProcessCounter
 
 
 ROOT_LOGGER = logging.getLogger(__name__.split(".")[0])
@@ -51,21 +58,50 @@ sys.excepthook = exception_hook
 # End of PyQt5 hack
 
 
-def setupLogging(verbose,path=None):
-    "Setup logging functionality"
+def setupLogging(verbose,path=None,stream=sys.stdout,maxBytes=logfile.MAX_BYTES):
+    "Setup logging functionality, log file gets rotated when exceeding given size"
     rootlogger = logging.getLogger()
-    hdl = logging.StreamHandler( sys.stdout )
+    hdl = logging.StreamHandler( stream )
     if verbose:
         hdl.setLevel( logging.DEBUG )
     else:
         hdl.setLevel( logging.INFO )
     rootlogger.addHandler( hdl )
     if path:
-        fhdl = logging.FileHandler( path, mode="w", encoding="utf-8" )
-        fhdl.setLevel( logging.DEBUG )
-        fhdl.setFormatter( logging.Formatter("%(asctime)s %(levelname)s %(pathname)s(%(lineno)d): %(message)s"))
-        rootlogger.addHandler( fhdl )
-    rootlogger.setLevel( logging.DEBUG )
+        logfile.attach( rootlogger, path, maxBytes=maxBytes )
+    # debug messages only get created when some handler shows them
+    rootlogger.setLevel( logging.DEBUG if verbose or path else logging.INFO )
+
+
+def parseInterval(text):
+    "Parse interval of trigger given as NAME=MSEC"
+    m = re.match(r"^(\w+)=0*([1-9]\d*)$", text)
+    if not m or m.group(1) not in schedule.DEFAULT_INTERVALS:
+        raise argparse.ArgumentTypeError("expected NAME=MSEC with MSEC above 0 and NAME one of {}".format(", ".join(schedule.ALL_TRIGGERS)))
+    return m.group(1), int(m.group(2))
+
+
+def parseAddress(text):
+    "Parse address to serve metrics at given as [HOST:]PORT or path of unix socket"
+    if "/" not in text and not re.match(r"^([\w.\-]+:)?\d+$", text):
+        raise argparse.ArgumentTypeError("expected [HOST:]PORT or path of unix socket")
+    return text
+
+
+def parseRule(text):
+    "Parse rule given as KIND:PATTERN or KIND:NAME=PATTERN"
+    m = re.match(r"^(\w+):(?:([^=]+)=)?(.+)$", text)
+    if not m or m.group(1) not in rules.KINDS:
+        raise argparse.ArgumentTypeError("expected KIND:PATTERN with KIND one of {}".format(", ".join(rules.KINDS)))
+    return m.group(1), m.group(2), m.group(3)
+
+
+def parseGroupRule(text):
+    "Parse rule of group given as KIND:PATTERN or KIND:NAME=PATTERN, of a kind whose values add up"
+    kind, name, pattern = parseRule(text)
+    if kind not in rules.GROUP_KINDS:
+        raise argparse.ArgumentTypeError("expected KIND:[NAME=]PATTERN with KIND one of {}".format(", ".join(rules.GROUP_KINDS)))
+    return kind, name, pattern
 
 
 def main():
@@ -77,9 +113,65 @@ def main():
                          help='Be more verbose on console.')
     grpMisc.add_argument('--log', dest='logPath', metavar="PATH",
                          help='Store verbose messages during processing in given file too.')
+    grpMisc.add_argument('--log-size', dest='logSize', metavar="MB", type=float, default=logfile.MAX_BYTES / 1024**2,
+                         help='Rotate log file when exceeding given size, keeping {} older files, default is %(default)s.'.format(
+                              logfile.NOF_BACKUPS))
+    grpMisc.add_argument('--profile', dest='profile', action="store_true",
+                         help='Measure time spent sampling and rendering, shown in window and printed to stderr on exit.')
+    grpSensors = parser.add_argument_group('Sensors')
+    grpSensors.add_argument('--proc-source', dest='procSource', choices=ProcessCounter.SOURCES, default="auto",
+                            help='Source for number of processes, "tasks" is the only one not scanning /proc on Linux, '
+                                 'so cheap with many processes, but counts threads too.')
+    grpSensors.add_argument('--backend', dest='backend', choices=backend.BACKENDS, default="auto",
+                            help='Source of sensor values, "proc" reads /proc of Linux directly and is cheaper than "psutil".')
+    grpSensors.add_argument('--interval', dest='intervals', metavar="NAME=MSEC", type=parseInterval, action="append", default=[],
+                            help='Sample sensor NAME every MSEC milliseconds, may be given repeatedly. Names are {}.'.format(
+                                 ", ".join(schedule.ALL_TRIGGERS)))
+    grpSensors.add_argument('--store', dest='storePath', metavar="DIR",
+                            help='Record history of sensors in given directory, keeping it across restarts and for longer graphs.')
+    grpSensors.add_argument('--export', dest='exportAddress', metavar="ADDR", type=parseAddress,
+                            help='Serve latest values at /metrics in Prometheus text format and at /metrics.json via HTTP, '
+                                 'at ADDR given as [HOST:]PORT with HOST defaulting to {}, or as path of a unix socket.'.format(
+                                 export.DEFAULT_HOST))
+    grpSensors.add_argument('--idle-backoff', dest='idleBackoff', metavar="FACTOR", type=float,
+                            help='Multiply sensor intervals by FACTOR while window is hidden, default is {}.'.format(schedule.IDLE_BACKOFF))
+    grpSensors.add_argument('--trace', dest='traces', metavar="NAME", choices=trace.SENSORS + ("all",), action="append", default=[],
+                            help='Log sampled values of sensor NAME with --verbose or --log, may be given repeatedly. Names are {}, or all.'.format(
+                                 ", ".join(trace.SENSORS)))
+    grpSensors.add_argument('--trace-every', dest='traceEvery', metavar="NUM", type=int, default=1,
+                            help='Log sampled values of traced sensors only every NUM-th time.')
+    grpHeadless = parser.add_argument_group('Headless')
+    grpHeadless.add_argument('--headless', dest='headless', action="store_true",
+                             help='Collect system info without GUI, writing one JSON record per line.')
+    grpHeadless.add_argument('--output', dest='outputPath', metavar="PATH",
+                             help='Append records to given file instead of stdout.')
+    grpHeadless.add_argument('--count', dest='count', metavar="NUM", type=int,
+                             help='Stop after given number of records.')
+    grpRules = parser.add_argument_group('Rules', """Select and group devices by glob patterns of their names,
+                                         where KIND is one of {}.""".format(", ".join(rules.KINDS)))
+    grpRules.add_argument('--include', dest='includes', metavar="KIND:PATTERN", type=parseRule, action="append", default=[],
+                          help='Only show devices matching PATTERN, may be given repeatedly.')
+    grpRules.add_argument('--exclude', dest='excludes', metavar="KIND:PATTERN", type=parseRule, action="append", default=[],
+                          help='Hide devices matching PATTERN, may be given repeatedly.')
+    grpRules.add_argument('--group', dest='groups', metavar="KIND:[NAME=]PATTERN", type=parseGroupRule, action="append", default=[],
+                          help='Show devices matching PATTERN summed up as one device NAME ( default is PATTERN ), e.g. "net:veth*". KIND is one of {}, as usage of partitions does not add up.'.format(
+                               ", ".join(rules.GROUP_KINDS)))
     args = parser.parse_args()
 
-    setupLogging( args.verbose, args.logPath )
+    # keep stdout clean for records when running headless
+    setupLogging( args.verbose, args.logPath, sys.stderr if args.headless and not args.outputPath else sys.stdout,
+                  int( args.logSize * 1024**2 ) )
+
+    ProcessCounter.defaultSource = args.procSource
+    backend.defaultBackend       = args.backend
+    profiling.enabled            = args.profile
+    trace.configure( args.traces, args.traceEvery )
+    for kind, _, pattern in args.includes:
+        rules.defaultRules[kind].include( pattern )
+    for kind, _, pattern in args.excludes:
+        rules.defaultRules[kind].exclude( pattern )
+    for kind, name, pattern in args.groups:
+        rules.defaultRules[kind].group( name or pattern, pattern )
 
     if sys.platform == "win32":
         # The default SIGBREAK action remains to call Win32 ExitProcess().
@@ -92,7 +184,17 @@ def main():
         proc.nice( psutil.HIGH_PRIORITY_CLASS )
     proc = None
 
-    return run_gui()
+    try:
+        if args.headless:
+            from systeminfo.headless import run_headless
+            return run_headless( dict(args.intervals), args.outputPath, args.count, args.storePath, args.exportAddress )
+
+        # import GUI only when needed, loading Qt takes a while
+        from systeminfo.ui.mainwindow import run_gui
+        return run_gui( dict(args.intervals), args.idleBackoff, args.storePath, args.exportAddress )
+    finally:
+        if profiling.enabled:
+            print( profiling.formatReport(), file=sys.stderr )
 
 
 if __name__ == '__main__':
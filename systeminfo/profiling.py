@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Measure time spent in named spans of code, aggregated into histograms per span.
+
+Spans cost a single check while profiling is disabled, e.g.
+
+    with profiling.span("backend.cpuLoads"):
+        loads = backend.cpuLoads()
+"""
+import contextlib
+import functools
+import math
+import threading
+import time
+
+
+enabled = False # whether spans get measured, e.g. selected from command line
+
+_histograms = {} # span name -> Histogram
+_lock       = threading.Lock()
+_disabled   = contextlib.nullcontext()
+
+
+class Histogram(object):
+    """Counts durations in nsec in buckets growing exponentially, with four buckets per power of two,
+    so percentiles are accurate within 25%. Count, total and maximum are exact."""
+
+    NOF_BUCKETS = 4 * 65
+
+    def __init__(self):
+        self.counts = [0] * Histogram.NOF_BUCKETS
+        self.count  = 0
+        self.total  = 0
+        self.max    = 0
+
+    @staticmethod
+    def _bucket(ns):
+        bits = ns.bit_length()
+        if bits < 3:
+            return ns
+        return bits * 4 + ( (ns >> (bits-3)) & 3 )
+
+    @staticmethod
+    def _upper(bucket):
+        "Get upper bound of durations in given bucket"
+        if bucket < 12:
+            return bucket
+        bits, sub = divmod(bucket, 4)
+        return (5 + sub) << (bits-3)
+
+    def add(self, ns):
+        self.counts[ self._bucket(ns) ] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, p):
+        "Get duration in nsec that given fraction ( 0...1 ) of durations doesn't exceed"
+        if not self.count:
+            return 0
+        target = max( 1, math.ceil( p * self.count ) )
+        seen   = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min( self._upper(bucket), self.max )
+        return self.max
+
+
+class Span(object):
+    "Context that adds the time spent within it to a histogram"
+
+    __slots__ = ( "_histogram", "_start" )
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+        self._start     = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._histogram.add( time.perf_counter_ns() - self._start )
+        return False
+
+
+def histogram(name):
+    "Get histogram of span with given name, created on first use"
+    hist = _histograms.get(name)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault( name, Histogram() )
+    return hist
+
+
+def span(name):
+    "Get context measuring time spent within it as span of given name, doing nothing while disabled"
+    if not enabled:
+        return _disabled
+    return Span( histogram(name) )
+
+
+def timed(name):
+    "Decorator measuring every call of the decorated function as span of given name"
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with Span( histogram(name) ):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, ns):
+    "Add duration in nsec measured elsewhere to span of given name"
+    if enabled:
+        histogram(name).add( ns )
+
+
+def reset():
+    "Forget all measured spans"
+    with _lock:
+        _histograms.clear()
+
+
+def report():
+    "Get list of tuples of name, count, p50, p99, maximum and total in usec of every span, sorted by total"
+    rows = [ ( name, h.count, h.percentile(0.5) / 1000, h.percentile(0.99) / 1000, h.max / 1000, h.total / 1000 )
+             for name, h in list(_histograms.items()) if h.count ]
+    rows.sort( key=lambda row: row[5], reverse=True )
+    return rows
+
+
+def formatReport():
+    "Get report of all spans as text table"
+    lines = [ "{:28s}{:>8s}{:>10s}{:>10s}{:>10s}{:>12s}".format("span", "count", "p50 us", "p99 us", "max us", "total ms") ]
+    for name, count, p50, p99, maximum, total in report():
+        lines.append( "{:28s}{:8d}{:10.1f}{:10.1f}{:10.1f}{:12.1f}".format(name, count, p50, p99, maximum, total / 1000) )
+    return "\n".join(lines)
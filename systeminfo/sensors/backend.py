@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Backends providing the raw values of the samplers, either using psutil or reading /proc directly.
+"""
+import logging
+import os
+
+import psutil
+
+
+LOGGER = logging.getLogger(__name__)
+
+BACKENDS = ( "auto", "proc", "psutil" )
+
+defaultBackend = "auto" # backend used when none is given, e.g. selected from command line
+
+
+def createBackend(name=None):
+    """Create backend of given name, where "auto" uses "proc" where available,
+    falling back to "psutil" otherwise"""
+    name = name or defaultBackend
+    assert name in BACKENDS
+    if name in ("auto", "proc"):
+        try:
+            return ProcBackend()
+        except OSError as e:
+            if name == "proc":
+                LOGGER.warning("createBackend: Backend proc not available, using psutil: {}".format(e))
+    return PsutilBackend()
+
+
+class PsutilBackend(object):
+    """Provides raw sensor values using psutil, available on all platforms.
+    Every instance keeps its own state to compute cpu loads between consecutive calls."""
+
+    name = "psutil"
+
+    def __init__(self):
+        self._lastCpuTimes = psutil.cpu_times(percpu=True)
+
+    def cpuLoads(self):
+        "Get tuple of lists of load and system load in percent per cpu since previous call"
+        cpuTimes = psutil.cpu_times(percpu=True)
+        usrLoads = []
+        sysLoads = []
+        for last, now in zip( self._lastCpuTimes, cpuTimes ):
+            total = _cpuTotal(now) - _cpuTotal(last)
+            # busy time rather than 100 - idle, so no elapsed time gives no load
+            usrLoads.append( _percent( total - ( now.idle - last.idle ), total ) )
+            sysLoads.append( _percent( now.system - last.system, total ) )
+        self._lastCpuTimes = cpuTimes
+        return usrLoads, sysLoads
+
+    def memory(self):
+        "Get tuple of used virtual memory in percent, available virtual memory in bytes and used swap memory in percent"
+        vmem    = psutil.virtual_memory()
+        swapmem = psutil.swap_memory()
+        return vmem.percent, vmem.available, swapmem.percent
+
+    def diskCounters(self):
+        "Get dict of tuple of total bytes read and written by disk name"
+        return { name: ( c.read_bytes, c.write_bytes ) for name, c in psutil.disk_io_counters(perdisk=True).items() }
+
+    def netCounters(self):
+        "Get dict of tuple of total bytes received and sent by interface name"
+        return { name: ( c.bytes_recv, c.bytes_sent ) for name, c in psutil.net_io_counters(pernic=True).items() }
+
+
+def _cpuTotal(times):
+    # guest times are already accounted in user times
+    return sum(times) - getattr(times, "guest", 0) - getattr(times, "guest_nice", 0)
+
+
+def _percent(delta, total):
+    if total <= 0:
+        return 0.0
+    return round( min( 100.0, max( 0.0, 100.0 * delta / total ) ), 1 )
+
+
+class ProcFile(object):
+    """File of /proc that is kept open and re-read from its start into a reusable buffer,
+    so every read needs neither an open/close nor a new buffer"""
+
+    def __init__(self, path, size=4096):
+        self._path   = path
+        self._fd     = os.open( path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) )
+        self._buffer = bytearray(size)
+
+    def __del__(self):
+        if getattr(self, "_fd", None) is not None:
+            os.close( self._fd )
+
+    def fileno(self):
+        "Get file descriptor, e.g. to poll for changes"
+        return self._fd
+
+    def read(self):
+        "Get current content as bytes"
+        while True:
+            nof = os.preadv( self._fd, [self._buffer], 0 )
+            if nof < len(self._buffer):
+                with memoryview(self._buffer) as view:
+                    return bytes( view[:nof] )
+            # content didn't fit, read again with larger buffer
+            self._buffer = bytearray( 2 * len(self._buffer) )
+
+
+class ProcBackend(object):
+    """Provides raw sensor values by parsing /proc/stat, /proc/meminfo, /proc/diskstats and /proc/net/dev
+    of Linux, only extracting the fields needed by the samplers. Raises OSError when not available.
+    Every instance keeps its own state to compute cpu loads between consecutive calls."""
+
+    name = "proc"
+
+    SECTOR_SIZE = 512 # bytes per sector of /proc/diskstats, independent of actual sector size of the disk
+
+    def __init__(self):
+        if not hasattr(os, "preadv"):
+            raise OSError("os.preadv not supported")
+        self._stat      = ProcFile("/proc/stat")
+        self._meminfo   = ProcFile("/proc/meminfo")
+        self._diskstats = ProcFile("/proc/diskstats")
+        self._netdev    = ProcFile("/proc/net/dev")
+        self._lastCpuTimes = self._cpuTimes()
+
+    def _cpuTimes(self):
+        # e.g. "cpu0 9012 0 2934 112294 298 0 2 1211 0 0" with user, nice, system, idle, iowait, irq,
+        # softirq, steal, guest and guest_nice in ticks. Get list of tuples of ( total, idle, system ).
+        times = []
+        for line in self._stat.read().splitlines():
+            if not line.startswith(b"cpu"):
+                break
+            if line[3:4] == b" ":
+                continue # sum of all cpus
+            fields = [ int(f) for f in line.split()[1:] ]
+            total  = sum( fields[:8] ) # guest times are already accounted in user times
+            times.append( ( total, fields[3], fields[2] ) )
+        return times
+
+    def cpuLoads(self):
+        "Get tuple of lists of load and system load in percent per cpu since previous call"
+        cpuTimes = self._cpuTimes()
+        usrLoads = []
+        sysLoads = []
+        for last, now in zip( self._lastCpuTimes, cpuTimes ):
+            total = now[0] - last[0]
+            usrLoads.append( _percent( total - ( now[1] - last[1] ), total ) )
+            sysLoads.append( _percent( now[2] - last[2], total ) )
+        self._lastCpuTimes = cpuTimes
+        return usrLoads, sysLoads
+
+    def memory(self):
+        "Get tuple of used virtual memory in percent, available virtual memory in bytes and used swap memory in percent"
+        # e.g. "MemAvailable:    5662784 kB"
+        values = {}
+        for line in self._meminfo.read().splitlines():
+            key, _, value = line.partition(b":")
+            if key in ( b"MemTotal", b"MemFree", b"MemAvailable", b"Buffers", b"Cached", b"SwapTotal", b"SwapFree" ):
+                values[key] = int( value.split()[0] ) * 1024
+        total = values[b"MemTotal"]
+        avail = values.get(b"MemAvailable")
+        if avail is None: # kernel before 3.14
+            avail = values[b"MemFree"] + values[b"Buffers"] + values[b"Cached"]
+        swapTotal = values[b"SwapTotal"]
+        return ( _percent( total - avail, total ), avail,
+                 _percent( swapTotal - values[b"SwapFree"], swapTotal ) )
+
+    def diskCounters(self):
+        "Get dict of tuple of total bytes read and written by disk name"
+        # e.g. "   7       0 loop0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0" with sectors read/written in 6th/10th field
+        counters = {}
+        for line in self._diskstats.read().splitlines():
+            fields = line.split()
+            counters[ fields[2].decode() ] = ( int(fields[5]) * self.SECTOR_SIZE, int(fields[9]) * self.SECTOR_SIZE )
+        return counters
+
+    def netCounters(self):
+        "Get dict of tuple of total bytes received and sent by interface name"
+        # e.g. "    lo: 33008955    3612    0 ..." with bytes received/sent in 1st/9th field, after two header lines
+        counters = {}
+        for line in self._netdev.read().splitlines()[2:]:
+            name, _, values = line.partition(b":")
+            fields = values.split()
+            counters[ name.strip().decode() ] = ( int(fields[0]), int(fields[8]) )
+        return counters
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Sampling clock based on a monotonic clock, unaffected by adjustments of the system time,
+to measure the time between samples, and wall-clock time to timestamp them.
+"""
+import time
+
+
+def monotonicNs():
+    "Get current time of monotonic clock in nsec"
+    return time.monotonic_ns()
+
+
+def sample(func, *args, **kwargs):
+    """Call func and get tuple of its result and the monotonic time in nsec when it was sampled,
+    i.e. the middle of the call, so slow calls or delayed ticks don't bias rates"""
+    before = time.monotonic_ns()
+    result = func(*args, **kwargs)
+    return result, ( before + time.monotonic_ns() ) // 2
+
+
+def elapsed(startNs, endNs):
+    "Get seconds between two monotonic times in nsec"
+    return ( endNs - startNs ) / 1e9
+
+
+def wallTime():
+    """Get current wall-clock time ( sec since epoch ) to timestamp samples for display and records.
+    Unlike the monotonic clock it keeps running during suspend, but it may step back or forth."""
+    return time.time()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Collect snapshots of all sensors at their scheduled intervals without Qt.
+"""
+import logging
+import time
+
+from systeminfo.sensors          import clock
+from systeminfo.sensors          import schedule
+from systeminfo.sensors.samplers import CpuSampler, ProcSampler, MemSampler, DiskSampler, NetSampler
+from systeminfo.sensors.samplers import MountTable, PartitionSampler
+from systeminfo.sensors.snapshot import Snapshot
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Collector(object):
+    """Runs the samplers of all triggers when due and collects their sections into one Snapshot per tick,
+    i.e. the same as the sensor singletons do in the worker thread of the GUI."""
+
+    def __init__(self, intervals=None):
+        "Construct collector using msec between triggers by trigger identifier, overriding the default intervals"
+        self._mountTable = MountTable()
+        self._samplers   = { schedule.TRIGGER_CPU:       CpuSampler().sample,
+                             schedule.TRIGGER_PROC:      ProcSampler().sample,
+                             schedule.TRIGGER_MEM:       MemSampler().sample,
+                             schedule.TRIGGER_DISK:      DiskSampler().sample,
+                             schedule.TRIGGER_NET:       NetSampler().sample,
+                             schedule.TRIGGER_MOUNTS:    self._refreshMounts,
+                             schedule.TRIGGER_PARTITION: PartitionSampler(self._mountTable).sample }
+        self._mountTable.refresh()
+        intervals = { t: max( schedule.MIN_INTERVAL, int(msec) ) for t, msec in (intervals or {}).items() }
+        self._schedule = schedule.Schedule( dict(schedule.DEFAULT_INTERVALS, **intervals), self._now() )
+
+    @staticmethod
+    def _now():
+        return time.monotonic() * 1000
+
+    def _refreshMounts(self):
+        if self._mountTable.refresh():
+            LOGGER.info("Collector: Mountpoints {}".format(", ".join(self._mountTable.mountpoints)))
+        return {}
+
+    def tick(self):
+        "Run samplers that are due now, get Snapshot of their sections or None when nothing was sampled"
+        sections = {}
+        for trigger in self._schedule.due( self._now() + schedule.COALESCE ):
+            sections.update( self._samplers[trigger]() )
+        if not sections:
+            return None
+        return Snapshot( time=clock.wallTime(), **sections )
+
+    def run(self, callback, count=None):
+        "Call callback with every Snapshot until given number of snapshots was collected, forever by default"
+        while count is None or count > 0:
+            time.sleep( max(0, self._schedule.nextDue() - self._now()) / 1000 )
+            snapshot = self.tick()
+            if snapshot is not None:
+                callback( snapshot )
+                if count is not None:
+                    count -= 1
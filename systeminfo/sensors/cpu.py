@@ -28,28 +28,21 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtCore import QTimer
 from PyQt5.QtCore import pyqtSlot, pyqtSignal, pyqtProperty
 from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QAbstractListModel, QModelIndex
 from PyQt5.QtQml  import qmlRegisterType
 
-import psutil
-
-from systeminfo.ui              import resources  # @UnusedImport Only need this to get access to embedded Qt resources
-from systeminfo.sensors.history import HistoryModel
-from systeminfo.sensors.trigger import TriggerSingleton
-from systeminfo.toolbox         import WorkerSingleton
+from systeminfo.ui                import resources  # @UnusedImport Only need this to get access to embedded Qt resources
+from systeminfo.sensors.history   import HistoryModel
+from systeminfo.sensors.hub       import SnapshotSingleton, SensorHub
+from systeminfo.sensors.samplers  import CpuSampler, ProcSampler
+from systeminfo.sensors.trigger   import TriggerSingleton
+from systeminfo.toolbox           import WorkerSingleton
 
 LOGGER = logging.getLogger(__name__)
 
 
 class CpuSingleton(QObject):
-    "Contains cpu information singleton"
-
-    updated     = pyqtSignal() # signal gets emitted whenever CPU load data has been updated
-    loadChanged = pyqtSignal(int,float,float) # signal gets emitted for new cpu %1 load update in percent %2 and system percent %3
-                                              # cpu 0 = avg of all CPUs
-                                              # cpu 1 = 1st CPU
-                                              # cpu 2 = 2nd CPU
-    nofCpuChanged = pyqtSignal(int) # signal gets emitted for change of total number of CPUs
-    nofProcChanged = pyqtSignal(int) # signal gets emitted for change of total number of processes
+    "Samples cpu information in worker thread"
 
     instance = None
 
@@ -63,48 +56,76 @@ class CpuSingleton(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._nofCpu  = 0
-        self._nofProc = 0
+        self._cpuSampler  = CpuSampler()
+        self._procSampler = ProcSampler()
         TriggerSingleton.get().triggered.connect( self._onTriggered )
-        self._setNofCpu( len(psutil.cpu_times_percent(0.1, percpu=True)) )
 
-    @pyqtSlot(int)
+    @pyqtSlot(str)
     def _onTriggered(self,trigger):
-        if trigger != TriggerSingleton.TRIGGER_FAST:
-            return
-        cpuTimes = psutil.cpu_times_percent(percpu=True)
-        usrLoads = [100-t.idle for t in cpuTimes]
-        sysLoads = [t.system for t in cpuTimes]
-        self._setNofCpu( len(cpuTimes) )
-        usrLoads.insert(0, sum(usrLoads) / len(usrLoads))
-        sysLoads.insert(0, sum(sysLoads) / len(sysLoads))
-        for i in range(len(usrLoads)):
-            u = usrLoads[i]
-            s = sysLoads[i]
-            LOGGER.info("CpuSingleton: [{}] {:5.1f}% {:5.1f}%".format(i,u,s))
-            self.loadChanged.emit(i,u,s)
-        self._setNofProc( len(psutil.pids()) )
-        self.updated.emit()
-
-    @pyqtProperty(int,notify=nofCpuChanged)
-    def nofCpu(self):
-        return self._nofCpu
+        if trigger == TriggerSingleton.TRIGGER_CPU:
+            SnapshotSingleton.get().add( **self._cpuSampler.sample() )
+        elif trigger == TriggerSingleton.TRIGGER_PROC:
+            SnapshotSingleton.get().add( **self._procSampler.sample() )
 
-    def _setNofCpu(self, nof):
-        if self._nofCpu != nof:
-            self._nofCpu = nof
-            LOGGER.info("CpuSingleton: {} CPUs".format(self._nofCpu))
-            self.nofCpuChanged.emit( self._nofCpu )
 
-    @pyqtProperty(int,notify=nofProcChanged)
-    def nofProc(self):
-        return self._nofProc
+class CpuLoadsModel(QAbstractListModel):
+    """Model of current loads with one row per cpu, where all rows get updated at once
+    whenever a snapshot contains cpu loads. Views only need to create delegates for visible rows."""
+
+    CpuRole        = Qt.UserRole + 1
+    PercentRole    = Qt.UserRole + 2
+    PercentSysRole = Qt.UserRole + 3
 
-    def _setNofProc(self, nof):
-        if self._nofProc != nof:
-            self._nofProc = nof
-            LOGGER.info("CpuSingleton: {} Processes".format(self._nofProc))
-            self.nofProcChanged.emit( self._nofProc )
+    instance = None
+
+    @staticmethod
+    def get():
+        "Get singleton instance, living in the thread of the first caller"
+        if CpuLoadsModel.instance == None:
+            CpuLoadsModel.instance = CpuLoadsModel()
+        return CpuLoadsModel.instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._loads = None # CpuSection of most recent snapshot
+        CpuSingleton.get()
+        SensorHub.get().snapshotReceived.connect( self._onSnapshotReceived )
+
+    @pyqtSlot(object)
+    def _onSnapshotReceived(self, snapshot):
+        loads = snapshot.cpu
+        if loads is None:
+            return
+        if loads.nofCpu != self.rowCount():
+            self.beginResetModel()
+            self._loads = loads
+            self.endResetModel()
+        elif loads.nofCpu:
+            self._loads = loads
+            self.dataChanged.emit( self.index(0), self.index(loads.nofCpu-1),
+                                   [CpuLoadsModel.PercentRole, CpuLoadsModel.PercentSysRole] )
+
+    def roleNames(self):
+        return { CpuLoadsModel.CpuRole:        b"cpu",
+                 CpuLoadsModel.PercentRole:    b"percent",
+                 CpuLoadsModel.PercentSysRole: b"percentSys" }
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._loads is None:
+            return 0
+        return self._loads.nofCpu
+
+    def data(self, idx, role=Qt.DisplayRole):
+        if not idx.isValid() or idx.row() >= self.rowCount():
+            return None
+        cpu = idx.row() + 1 # first load is the average of all cpus
+        if role == CpuLoadsModel.CpuRole:
+            return cpu
+        if role == CpuLoadsModel.PercentRole or role == Qt.DisplayRole:
+            return self._loads.usrLoads[cpu]
+        if role == CpuLoadsModel.PercentSysRole:
+            return self._loads.sysLoads[cpu]
+        return None
 
 
 class CpuInfo(QObject):
@@ -123,32 +144,22 @@ class CpuInfo(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        CpuSingleton.get().updated.connect( self.updated )
-        CpuSingleton.get().nofCpuChanged.connect( self.nofCpuChanged )
-        CpuSingleton.get().nofProcChanged.connect( self.nofProcChanged )
-        CpuSingleton.get().nofProcChanged.connect( self._onNofProcChanged )
-        CpuSingleton.get().loadChanged.connect( self._onLoadChanged )
+        CpuSingleton.get()
+        SensorHub.get().cpuUpdated.connect( self.updated )
+        SensorHub.get().nofCpuChanged.connect( self.nofCpuChanged )
+        SensorHub.get().nofProcChanged.connect( self.nofProcChanged )
         self._cpu         = 0
         self._percent     = 0
         self._percentSys  = 0
-        self._cpuHistory  = HistoryModel(nofCols=2,parent=self)
-        self._procHistory = HistoryModel(nofCols=1,parent=self)
+        SensorHub.get().dispatcher("cpu").subscribe( self._cpu, self, self._onLoadChanged )
 
-    @pyqtSlot(int,float,float)
-    def _onLoadChanged(self,cpu,usrPercent,sysPercent):
-        if cpu != self._cpu:
-            return
+    def _onLoadChanged(self,usrPercent,sysPercent):
         self._setPercent(usrPercent)
         self._setPercentSys(sysPercent)
-        self._cpuHistory.pushData( usrPercent, sysPercent )
-
-    @pyqtSlot(int)
-    def _onNofProcChanged(self,nof):
-        self._procHistory.pushData( nof )
 
     @pyqtProperty(float,notify=nofCpuChanged)
     def nofCpu(self):
-        return CpuSingleton.get().nofCpu
+        return SensorHub.get().nofCpu
 
     @pyqtProperty(int,notify=cpuChanged)
     def cpu(self):
@@ -157,7 +168,9 @@ class CpuInfo(QObject):
     @cpu.setter
     def cpu(self,i):
         if self._cpu != i:
+            SensorHub.get().dispatcher("cpu").unsubscribe( self._cpu, self )
             self._cpu = i
+            SensorHub.get().dispatcher("cpu").subscribe( self._cpu, self, self._onLoadChanged )
             self.cpuChanged.emit(self._cpu)
 
     @pyqtProperty(float,notify=percentChanged)
@@ -180,12 +193,17 @@ class CpuInfo(QObject):
 
     @pyqtProperty(int,notify=nofProcChanged)
     def nofProc(self):
-        return CpuSingleton.get().nofProc
+        return SensorHub.get().nofProc
 
-    @pyqtProperty(HistoryModel,constant=True)
+    @pyqtProperty(HistoryModel,notify=cpuChanged)
     def cpuHistory(self):
-        return self._cpuHistory
+        return SensorHub.get().history( "cpu", self._cpu )
+
+    @pyqtProperty(CpuLoadsModel,constant=True)
+    def loads(self):
+        "Model of current loads of all cpus, shared by all instances"
+        return CpuLoadsModel.get()
 
     @pyqtProperty(HistoryModel,constant=True)
     def procHistory(self):
-        return self._procHistory
+        return SensorHub.get().history( "nofProc" )
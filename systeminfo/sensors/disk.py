@@ -21,27 +21,53 @@ Copyright 2017 Manuel Koch
 
 System info related to disks / partitions.
 """
-import datetime
 import logging
-import os
-import sys
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtCore import pyqtSlot, pyqtSignal, pyqtProperty
 from PyQt5.QtCore import QObject
 from PyQt5.QtQml  import qmlRegisterType
 
-import psutil
-
 from systeminfo.ui              import resources  # @UnusedImport Only need this to get access to embedded Qt resources
-from systeminfo.toolbox         import bytesToText, WorkerSingleton
-from systeminfo.sensors.history import HistoryModel
-from systeminfo.sensors.trigger import TriggerSingleton
+from systeminfo.toolbox          import bytesToText, WorkerSingleton
+from systeminfo.sensors.history  import HistoryModel
+from systeminfo.sensors.hub      import SnapshotSingleton, SensorHub
+from systeminfo.sensors.samplers import DiskSampler, MountTable, PartitionSampler
+from systeminfo.sensors.trigger  import TriggerSingleton
 
 
 LOGGER = logging.getLogger(__name__)
 
 
+class PartitionSingleton(QObject):
+    "Samples partition information in worker thread"
+
+    instance = None
+
+    @staticmethod
+    def get():
+        "Get singleton instance"
+        if PartitionSingleton.instance == None:
+            PartitionSingleton.instance = PartitionSingleton()
+            WorkerSingleton.get().registerSingleton( PartitionSingleton.instance )
+        return PartitionSingleton.instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._mountTable = MountTable()
+        self._mountTable.refresh()
+        self._sampler    = PartitionSampler( self._mountTable )
+        TriggerSingleton.get().triggered.connect( self._onTriggered )
+
+    @pyqtSlot(str)
+    def _onTriggered(self,trigger):
+        if trigger == TriggerSingleton.TRIGGER_MOUNTS:
+            if self._mountTable.refresh():
+                LOGGER.info("PartitionSingleton: Mountpoints {}".format(", ".join(self._mountTable.mountpoints)))
+        elif trigger == TriggerSingleton.TRIGGER_PARTITION:
+            SnapshotSingleton.get().add( **self._sampler.sample() )
+
+
 class PartitionsInfo(QObject):
     "Contains partitions information"
 
@@ -53,26 +79,12 @@ class PartitionsInfo(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._paths = []
-        TriggerSingleton.get().triggered.connect( self._onTriggered )
-        self._onTriggered()
-
-    @pyqtSlot(int)
-    def _onTriggered(self,trigger=TriggerSingleton.TRIGGER_SLOW):
-        if trigger != TriggerSingleton.TRIGGER_SLOW:
-            return
-        paths = [partition.mountpoint for partition in psutil.disk_partitions()]
-        paths.sort( key=lambda k: k.lower() )
-        self._setPaths( paths )
+        PartitionSingleton.get()
+        SensorHub.get().partitionsChanged.connect( self.pathsChanged )
 
     @pyqtProperty('QStringList',notify=pathsChanged)
     def paths(self):
-        return self._paths
-
-    def _setPaths(self, paths):
-        if paths != self._paths:
-            self._paths = paths
-            self.pathsChanged.emit()
+        return SensorHub.get().partitions
 
 
 class PartitionInfo(QObject):
@@ -97,37 +109,19 @@ class PartitionInfo(QObject):
         self._avail     = False
         self._freeBytes = 0
         self._freeText  = ""
-        TriggerSingleton.get().triggered.connect( self._onTriggered )
+        PartitionSingleton.get()
+        SensorHub.get().dispatcher("partitions").subscribe( self._path, self, self._onUsageChanged )
 
-    @pyqtSlot(int)
-    def _onTriggered(self,trigger):
-        if trigger != TriggerSingleton.TRIGGER_SLOW:
-            return
-
-        if sys.platform == "win32" or sys.platform == "cygwin":
-            # need to disable special windows error handling that causes a popup dialog
-            # when drive has been ejected and we try to access it ( e.g. via isdir call ).
-            import win32api
-            oldError = win32api.SetErrorMode( 1 ) # SEM_FAILCRITICALERRORS = 1
-            pathValid = os.path.isdir(self._path)
-            win32api.SetErrorMode( oldError )
-        else:
-            pathValid = os.path.isdir(self._path)
-
-        if not pathValid:
+    def _onUsageChanged(self,disk,percent,freeBytes,avail):
+        self._setDisk( disk )
+        if not avail:
             self._setPercent( 0 )
             self._setAvail(False)
             return
-        try:
-            usage = psutil.disk_usage(self._path)
-            LOGGER.info("PartitionInfo: [{}] {:5.1f}%".format(self._path,usage.percent))
-            self._setPercent( usage.percent )
-            self._setFreeBytes( usage.free )
-            self._setAvail(True)
-            self._setFreeText( bytesToText(float(usage.free)) )
-        except FileNotFoundError:
-            self._setPercent( 0 )
-            self._setAvail(False)
+        self._setPercent( percent )
+        self._setFreeBytes( freeBytes )
+        self._setAvail(True)
+        self._setFreeText( bytesToText(float(freeBytes)) )
 
     @pyqtProperty('QString',notify=pathChanged)
     def path(self):
@@ -136,10 +130,10 @@ class PartitionInfo(QObject):
     @path.setter
     def path(self, path):
         if path != self._path:
+            SensorHub.get().dispatcher("partitions").unsubscribe( self._path, self )
             self._path = path
+            SensorHub.get().dispatcher("partitions").subscribe( self._path, self, self._onUsageChanged )
             self.pathChanged.emit( self._path )
-            partition = [p for p in psutil.disk_partitions() if p.mountpoint == self._path][0]
-            self._setDisk( partition.device )
 
     @pyqtProperty('QString',notify=diskChanged)
     def disk(self):
@@ -188,12 +182,7 @@ class PartitionInfo(QObject):
 
 
 class DiskSingleton(QObject):
-    "Contains disk information singleton"
-
-    updated      = pyqtSignal() # signal gets emitted whenever disk data has been updated
-    disksChanged = pyqtSignal('QStringList') # signal gets emitted whenever list of disks has been updated
-    ioChanged    = pyqtSignal("QString",int,int) # signal gets emitted for read bytes %2 and write bytes %3 for selected disk %1
-                                                 # empty disk = sum of all disks
+    "Samples disk information in worker thread"
 
     instance = None
 
@@ -207,45 +196,14 @@ class DiskSingleton(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._lastCounters  = None
-        self._lastTimestamp = None
-        self._disks         = []
+        self._sampler = DiskSampler()
         TriggerSingleton.get().triggered.connect( self._onTriggered )
 
-    @pyqtSlot(int)
+    @pyqtSlot(str)
     def _onTriggered(self,trigger):
-        if trigger != TriggerSingleton.TRIGGER_SLOW:
+        if trigger != TriggerSingleton.TRIGGER_DISK:
             return
-
-        now = datetime.datetime.now()
-        counters = psutil.disk_io_counters(perdisk=True)
-
-        disks = list( counters.keys() )
-        disks.sort(key=lambda d: d.lower())
-        if self._disks != disks:
-            self._disks = disks
-            LOGGER.info("DiskSingleton: Disks {}".format(", ".join(self._disks)))
-            self.disksChanged.emit( self._disks )
-
-        if self._lastCounters:
-            dt = now - self._lastTimestamp
-            allReadBytes  = 0
-            allWriteBytes = 0
-            for disk, counter in counters.items():
-                if not disk in self._lastCounters:
-                    continue
-                readBytes  = int( (counter.read_bytes - self._lastCounters[disk].read_bytes) / dt.total_seconds() )
-                writeBytes = int( (counter.write_bytes - self._lastCounters[disk].write_bytes) / dt.total_seconds() )
-                allReadBytes  += readBytes
-                allWriteBytes += writeBytes
-                LOGGER.info("DiskSingleton: {:9d} read, {:9d} write for {}".format(readBytes,writeBytes,disk))
-                self.ioChanged.emit(disk,readBytes,writeBytes)
-            LOGGER.info("DiskSingleton: {:9d} read, {:9d} write for all".format(allReadBytes,allWriteBytes))
-            self.ioChanged.emit("",allReadBytes,allWriteBytes)
-            self.updated.emit()
-
-        self._lastTimestamp = now
-        self._lastCounters  = counters
+        SnapshotSingleton.get().add( **self._sampler.sample() )
 
 
 class DisksInfo(QObject):
@@ -260,8 +218,9 @@ class DisksInfo(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._disks = []
-        DiskSingleton.get().disksChanged.connect( self._setDisks )
+        DiskSingleton.get()
+        self._disks = SensorHub.get().disks
+        SensorHub.get().disksChanged.connect( self._setDisks )
 
     @pyqtProperty(int,notify=nofDisksChanged)
     def nofDisks(self):
@@ -301,19 +260,15 @@ class DiskInfo(QObject):
         self._readText   = ""
         self._writeBytes = 0
         self._writeText  = ""
-        self._history    = HistoryModel(nofCols=2,parent=self)
-        DiskSingleton.get().ioChanged.connect(self._onIoChanged)
+        DiskSingleton.get()
+        SensorHub.get().dispatcher("disk").subscribe( self._disk, self, self._onIoChanged )
 
-    @pyqtSlot("QString",int,int)
-    def _onIoChanged(self,disk,readBytes,writeBytes):
-        if disk != self._disk:
-            return
+    def _onIoChanged(self,readBytes,writeBytes):
         self._setReadBytes(readBytes)
         self._setReadText( "{}/sec".format(bytesToText(float(readBytes))) )
         self._setWriteBytes(writeBytes)
         self._setWriteText( "{}/sec".format(bytesToText(float(writeBytes))) )
         self._setIsBusy( (readBytes+writeBytes) != 0 )
-        self._history.pushData( readBytes, writeBytes )
 
     @pyqtProperty('QString',notify=diskChanged)
     def disk(self):
@@ -322,7 +277,9 @@ class DiskInfo(QObject):
     @disk.setter
     def disk(self, disk):
         if disk != self._disk:
+            SensorHub.get().dispatcher("disk").unsubscribe( self._disk, self )
             self._disk = disk
+            SensorHub.get().dispatcher("disk").subscribe( self._disk, self, self._onIoChanged )
             self.diskChanged.emit( self._disk )
 
     @pyqtProperty(bool,notify=isBusyChanged)
@@ -370,6 +327,6 @@ class DiskInfo(QObject):
             self._writeText = writeText
             self.writeTextChanged.emit( self._writeText )
 
-    @pyqtProperty(HistoryModel,constant=True)
+    @pyqtProperty(HistoryModel,notify=diskChanged)
     def history(self):
-        return self._history
+        return SensorHub.get().history( "disk", self._disk )
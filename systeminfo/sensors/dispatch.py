@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Dispatch batched sensor updates to subscribers by key.
+"""
+import functools
+import logging
+
+from PyQt5.QtCore import QObject
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class KeyedDispatcher(QObject):
+    """Calls the subscribers of every key in a batch of sensor values. A batch provides get(key)
+    returning a tuple of values for that key ( e.g. cpu index or disk name ) or None, like a dict
+    or a section of a snapshot. Every subscriber gets exactly one call per batch, instead of
+    receiving all values of a batch and dropping the ones of other keys."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._subscribers = {} # key -> { receiver id -> callback }
+        self._receivers   = set() # id of receivers that are watched for destruction
+
+    def subscribe(self, key, receiver, callback):
+        """Call callback with values of given key for every batch, until the receiver ( a QObject )
+        unsubscribes or gets destroyed. A receiver has one subscription per key."""
+        self._subscribers.setdefault(key, {})[id(receiver)] = callback
+        if id(receiver) not in self._receivers:
+            self._receivers.add( id(receiver) )
+            receiver.destroyed.connect( functools.partial(self._onReceiverDestroyed, id(receiver)) )
+
+    def unsubscribe(self, key, receiver):
+        "Stop calling subscription of receiver for given key"
+        callbacks = self._subscribers.get(key, {})
+        callbacks.pop(id(receiver), None)
+        if not callbacks:
+            self._subscribers.pop(key, None)
+
+    def _onReceiverDestroyed(self, receiverId, obj=None):
+        self._receivers.discard( receiverId )
+        for key in list(self._subscribers):
+            callbacks = self._subscribers[key]
+            callbacks.pop(receiverId, None)
+            if not callbacks:
+                del self._subscribers[key]
+
+    def dispatch(self, batch):
+        "Call subscribers of every key with values of that key in given batch"
+        for key, callbacks in list(self._subscribers.items()):
+            values = batch.get(key)
+            if values is None:
+                continue
+            for callback in list(callbacks.values()):
+                callback(*values)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Serve the latest sensor values via HTTP in Prometheus text format and as JSON, without any
+dependency on Qt, to be fed by the worker thread of the GUI as well as in headless mode.
+
+Both formats get rendered into buffers at most once per snapshot, when first requested,
+so the cost of scraping doesn't depend on how often it happens.
+"""
+import errno
+import http.server
+import json
+import logging
+import os
+import socketserver
+import stat
+import threading
+
+from systeminfo.sensors.snapshot import Snapshot
+
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+JSON_TYPE       = "application/json"
+
+
+def _label(value):
+    "Get value escaped as Prometheus label value"
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _deviceLabel(name):
+    "Get label of device in IoSection, where the sum of all devices has an empty name"
+    return _label(name) if name else "all"
+
+
+class Metrics(object):
+    "Lines of Prometheus text format, grouped by metric"
+
+    def __init__(self):
+        self._lines = []
+
+    def add(self, name, help, samples):
+        "Add gauge of given name with list of tuples of label text and value"
+        if not samples:
+            return
+        self._lines.append( "# HELP systeminfo_{} {}".format(name, help) )
+        self._lines.append( "# TYPE systeminfo_{} gauge".format(name) )
+        for labels, value in samples:
+            if labels:
+                self._lines.append( "systeminfo_{}{{{}}} {}".format(name, labels, value) )
+            else:
+                self._lines.append( "systeminfo_{} {}".format(name, value) )
+
+    def text(self):
+        return "\n".join(self._lines) + "\n"
+
+
+def _cpuMetrics(metrics, cpu):
+    cpus = [ "all" ] + [ str(i) for i in range(cpu.nofCpu) ]
+    metrics.add( "cpu_load_percent", "Load per cpu in percent.",
+                 [ ( 'cpu="{}"'.format(c), load ) for c, load in zip(cpus, cpu.usrLoads) ] )
+    metrics.add( "cpu_system_load_percent", "System load per cpu in percent.",
+                 [ ( 'cpu="{}"'.format(c), load ) for c, load in zip(cpus, cpu.sysLoads) ] )
+
+
+def _nofProcMetrics(metrics, nofProc):
+    metrics.add( "processes", "Number of processes.", [ ( "", nofProc ) ] )
+
+
+def _memMetrics(metrics, mem):
+    metrics.add( "memory_used_percent", "Used virtual memory in percent.", [ ( "", mem.vmemPercent ) ] )
+    metrics.add( "memory_available_bytes", "Available virtual memory in bytes.", [ ( "", mem.vmemAvailBytes ) ] )
+    metrics.add( "swap_used_percent", "Used swap memory in percent.", [ ( "", mem.swapmemPercent ) ] )
+
+
+def _diskMetrics(metrics, disk):
+    labels = [ 'disk="{}"'.format( _deviceLabel(name) ) for name in disk.names ]
+    metrics.add( "disk_read_bytes_per_second", "Bytes read per second by disk.", list( zip(labels, disk.inBytes) ) )
+    metrics.add( "disk_written_bytes_per_second", "Bytes written per second by disk.", list( zip(labels, disk.outBytes) ) )
+
+
+def _netIoMetrics(metrics, netIo):
+    labels = [ 'interface="{}"'.format( _deviceLabel(name) ) for name in netIo.names ]
+    metrics.add( "network_received_bytes_per_second", "Bytes received per second by network interface.",
+                 list( zip(labels, netIo.inBytes) ) )
+    metrics.add( "network_sent_bytes_per_second", "Bytes sent per second by network interface.",
+                 list( zip(labels, netIo.outBytes) ) )
+
+
+def _netUpMetrics(metrics, netUp):
+    metrics.add( "network_up", "Whether network interface is up.",
+                 [ ( 'interface="{}"'.format( _label(name) ), int(isUp) ) for name, isUp in zip(netUp.names, netUp.isUp) ] )
+
+
+def _partitionsMetrics(metrics, partitions):
+    labels = [ 'mountpoint="{}",disk="{}"'.format( _label(name), _label(disk) )
+               for name, disk in zip(partitions.names, partitions.disks) ]
+    metrics.add( "partition_available", "Whether partition responded in time.",
+                 [ ( label, int(avail) ) for label, avail in zip(labels, partitions.avail) ] )
+    metrics.add( "partition_used_percent", "Used space of partition in percent.",
+                 [ ( label, percent ) for label, percent, avail in zip(labels, partitions.percents, partitions.avail) if avail ] )
+    metrics.add( "partition_free_bytes", "Free space of partition in bytes.",
+                 [ ( label, free ) for label, free, avail in zip(labels, partitions.freeBytes, partitions.avail) if avail ] )
+
+
+SECTION_METRICS = { "cpu":        _cpuMetrics, # function adding metrics of a section by field of Snapshot
+                    "nofProc":    _nofProcMetrics,
+                    "mem":        _memMetrics,
+                    "disk":       _diskMetrics,
+                    "netIo":      _netIoMetrics,
+                    "netUp":      _netUpMetrics,
+                    "partitions": _partitionsMetrics }
+
+
+def renderSection(field, section):
+    "Get tuple of Prometheus text and JSON text of given section by its field of Snapshot"
+    metrics = Metrics()
+    SECTION_METRICS[field]( metrics, section )
+    record = Snapshot( **{ field: section } ).toRecord()[field]
+    return metrics.text(), json.dumps( record, separators=(",",":") )
+
+
+class MetricsExporter(object):
+    """Keeps the latest value of every section of the pushed snapshots, as a section is only
+    sampled in the ticks of its trigger. Both formats get rendered on the first request after
+    a push, only re-rendering the sections that were pushed since, so pushing costs next to
+    nothing and requests in between send the same buffers."""
+
+    def __init__(self):
+        self._lock       = threading.Lock()
+        self._time       = None
+        self._sections   = {} # field of Snapshot -> latest section
+        self._rendered   = {} # field of Snapshot -> tuple of Prometheus and JSON text of latest section
+        self._prometheus = None
+        self._json       = None
+        self._server     = None
+
+    @property
+    def prometheus(self):
+        "Get latest sensor values in Prometheus text format as bytes"
+        with self._lock:
+            if self._prometheus is None:
+                self._render()
+            return self._prometheus
+
+    @property
+    def json(self):
+        "Get latest sensor values as JSON bytes"
+        with self._lock:
+            if self._json is None:
+                self._render()
+            return self._json
+
+    def push(self, snapshot):
+        "Keep sections sampled in given snapshot, to be rendered by next request"
+        with self._lock:
+            self._time = snapshot.time
+            for field in Snapshot._fields[1:]:
+                section = getattr( snapshot, field )
+                if section is not None:
+                    self._sections[field] = section
+                    self._rendered.pop( field, None )
+            self._prometheus = None
+            self._json       = None
+
+    def _render(self):
+        prometheus = []
+        records    = []
+        if self._time is not None:
+            metrics = Metrics()
+            metrics.add( "snapshot_timestamp_seconds", "Wall-clock time of latest snapshot.", [ ( "", self._time ) ] )
+            prometheus.append( metrics.text() )
+            records.append( '"time":{}'.format( json.dumps(self._time) ) )
+        for field in Snapshot._fields[1:]:
+            if field not in self._sections:
+                continue
+            if field not in self._rendered:
+                self._rendered[field] = renderSection( field, self._sections[field] )
+            text, record = self._rendered[field]
+            prometheus.append( text )
+            records.append( '"{}":{}'.format( field, record ) )
+        self._prometheus = "".join( prometheus ).encode("utf-8")
+        self._json       = ( "{" + ",".join( records ) + "}" ).encode("utf-8")
+
+    def serve(self, address):
+        """Serve buffers in a thread of its own at given address, either a path of a unix socket
+        ( containing a slash ) or [HOST:]PORT, where HOST defaults to localhost"""
+        if "/" in address:
+            try:
+                if not stat.S_ISSOCK( os.lstat(address).st_mode ):
+                    raise FileExistsError( errno.EEXIST, "Not a socket", address )
+                os.unlink(address) # stale socket of a previous run
+            except FileNotFoundError:
+                pass
+            self._server = _UnixServer( address, _Handler )
+        else:
+            host, _, port = address.rpartition(":")
+            self._server = _TcpServer( ( host or DEFAULT_HOST, int(port) ), _Handler )
+        self._server.exporter = self
+        threading.Thread( target=self._server.serve_forever, name="MetricsExporter", daemon=True ).start()
+        LOGGER.info("MetricsExporter: Serving /metrics and /metrics.json at {}".format(address))
+
+    def close(self):
+        "Stop serving"
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            if isinstance(self._server, _UnixServer):
+                os.unlink( self._server.server_address )
+            self._server = None
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    "Sends current buffer of exporter of server by path"
+
+    def _send(self, withBody):
+        exporter = self.server.exporter
+        if self.path == "/metrics":
+            body, contentType = exporter.prometheus, PROMETHEUS_TYPE
+        elif self.path == "/metrics.json":
+            body, contentType = exporter.json, JSON_TYPE
+        else:
+            self.send_error( 404 )
+            return
+        self.send_response( 200 )
+        self.send_header( "Content-Type", contentType )
+        self.send_header( "Content-Length", str(len(body)) )
+        self.end_headers()
+        if withBody:
+            self.wfile.write( body )
+
+    def do_GET(self):
+        self._send( True )
+
+    def do_HEAD(self):
+        self._send( False )
+
+    def address_string(self):
+        # client address of a unix socket is empty
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        LOGGER.debug("MetricsExporter: %s " + format, self.address_string(), *args)
+
+
+class _TcpServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads      = True
+    allow_reuse_address = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
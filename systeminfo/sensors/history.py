@@ -21,60 +21,190 @@ Copyright 2017 Manuel Koch
 
 Data model for history of system sensor values.
 """
-import datetime
+import bisect
 import logging
+import math
 
-from PyQt5.QtCore import Qt, pyqtProperty, pyqtSignal
-from PyQt5.QtCore import QAbstractItemModel
+from PyQt5.QtCore import Qt, pyqtProperty, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex
+
+from systeminfo                    import profiling
+from systeminfo.sensors            import clock
+from systeminfo.sensors            import store
+from systeminfo.sensors.ringbuffer import RingBuffer
 
 
 LOGGER = logging.getLogger(__name__)
 
 
-class HistoryModel(QAbstractItemModel):
+def decimate(xs, ys, step):
+    """Reduce rows to the first and last row of every bucket of given step in x, starting at multiples
+    of step, and the rows with minimum and maximum value of every column within that bucket ( M4 ).
+    Buckets don't depend on the first row, so a row stays in its bucket while the window slides.
+    Returns tuple of remaining xs and list of remaining values per column."""
+    keep = []
+    first = 0
+    while first < len(xs):
+        end  = ( math.floor( xs[first] / step ) + 1 ) * step
+        last = max( first+1, bisect.bisect_left( xs, end, first ) )
+        rows = { first, last-1 }
+        for y in ys:
+            bucket = y[first:last]
+            rows.add( first + bucket.index( min(bucket) ) )
+            rows.add( first + bucket.index( max(bucket) ) )
+        keep.extend( sorted(rows) )
+        first = last
+    return [xs[row] for row in keep], [[y[row] for row in keep] for y in ys]
+
+
+class HistoryModel(QAbstractTableModel):
     """Model of history data arranged in rows, where column 0 is the timestamp ( sec since epoch )
-    and following columns are data.
+    and following columns are data. When a HistoryStore is given, only recent rows are kept in memory
+    and older ranges get paged in from the store on demand.
     """
 
-    durationChanged = pyqtSignal(int)
+    MEMORY_DURATION = 300 # max seconds of rows kept in memory when older rows can be paged in from a store
+
+    durationChanged   = pyqtSignal(int)
+    aggregatesChanged = pyqtSignal() # signal gets emitted when minimums, maximums or averages have changed
 
-    def __init__(self, duration=60, nofCols=1, parent=None):
+    def __init__(self, duration=60, nofCols=1, interval=1.0, store=None, section=None, key=None, parent=None):
         """Construct  history model, keeping max number of seconds of recent pushed data and
-        given number of data columns. Use tuple of defaultValues to initialize history in the past."""
+        given number of data columns. Data is expected to be pushed every given interval in seconds,
+        which determines the capacity of the history buffer. Older data is read from given store
+        by section name and key, if any."""
         super().__init__(parent)
-        self._rows     = []
         self._duration = duration
+        self._interval = interval
         self._columns  = nofCols
-
+        self._store    = store
+        self._section  = section
+        self._key      = key
+        self._rows     = RingBuffer(self._capacity(duration), nofCols)
+        self._samples  = None # cached result of samples(), as tuple of window start row and data
+        self._older    = None # cached result of store query, as tuple of query, data, minimums and maximums
+
+    def _kept(self, duration):
+        "Number of seconds to keep in memory for given duration"
+        return min( duration, HistoryModel.MEMORY_DURATION ) if self._store is not None else duration
+
+    def _capacity(self, duration):
+        "Number of rows to keep for given duration, including the row preceding the duration"
+        return int(math.ceil(self._kept(duration) / self._interval)) + 2
+
+    @profiling.timed("HistoryModel.pushData")
     def pushData(self,*dataColumns):
         assert len(dataColumns) == self._columns
-        self.beginResetModel()
-        while self._rows and self._rows[0][0] + self._duration < self._rows[-1][0]:
-            self._rows.pop( 0 )
-        self._rows.append( (datetime.datetime.now().timestamp(),) + dataColumns )
-        self.endResetModel()
-
-    def index(self,row,col,parent=None):
-        return self.createIndex(row,col)
-
-    def rowCount(self,parent=None):
+        now = clock.wallTime()
+        if self._rows and now < self._rows.last(0):
+            self._dropRows( len(self._rows) ) # wall-clock stepped back, keep rows in time order
+        nofOutdated = 0
+        if self._rows:
+            nofOutdated = self._rows.nofOlderThan( self._rows.last(0) - self._kept(self._duration) )
+        if len(self._rows) - nofOutdated == self._rows.capacity:
+            nofOutdated += 1 # make room for the new row
+        self._dropRows( nofOutdated )
+        row = len(self._rows)
+        self.beginInsertRows( QModelIndex(), row, row )
+        self._rows.push( now, *dataColumns )
+        self._samples = None
+        self.endInsertRows()
+        self.aggregatesChanged.emit()
+
+    def _dropRows(self, nofRows):
+        "Drop given number of oldest rows, notifying attached views about removed rows"
+        if nofRows <= 0:
+            return
+        self.beginRemoveRows( QModelIndex(), 0, nofRows-1 )
+        self._rows.drop( nofRows )
+        self._samples = None
+        self.endRemoveRows()
+
+    @pyqtSlot(float,result='QVariantMap')
+    @pyqtSlot(float,int,result='QVariantMap')
+    def samples(self,since,pixels=0):
+        """Get data of all rows within the window starting at given timestamp in one call.
+        Returns a map with list of timestamps "x" and a list of values per data column "y",
+        including the row preceding the window, if any, to be able to draw data from the start
+        of the window. Rows older than kept in memory are averages from the store, if any.
+        When given number of pixels to draw the window is less than the number of rows, only the
+        first, last, minimum and maximum rows per bucket of at most a pixel are returned. Result is cached until new data arrives."""
+        first = max( 0, self._rows.nofOlderThan( since )-1 )
+        older = self._olderSamples( since ) if first == 0 else None
+        if first != 0:
+            self._older = None
+        key = ( first, older[0] if older else None, pixels )
+        if self._samples is None or self._samples[0] != key:
+            xs = self._rows.column(0,first).tolist()
+            ys = [self._rows.column(col,first).tolist() for col in range(1,self._rows.nofColumns)]
+            if older:
+                # query of store ends at a multiple of its step, skip its rows overlapping rows in memory
+                nofOlder = bisect.bisect_left( older[1][0], xs[0] ) if xs else len(older[1][0])
+                xs = older[1][0][:nofOlder] + xs
+                ys = [ aggregates[2][:nofOlder] + y for aggregates, y in zip(older[1][1], ys) ]
+            if 0 < pixels < len(xs) and xs[-1] > since:
+                # a power of two step stays the same while the window slides, it is at most one pixel wide
+                xs, ys = decimate( xs, ys, 2 ** math.floor( math.log2( (xs[-1] - since) / pixels ) ) )
+            self._samples = ( key, { "x": xs, "y": ys } )
+        return self._samples[1]
+
+    def _olderSamples(self, since):
+        """Get cached result of store query for rows since given timestamp that are older than
+        the rows in memory, None without store or such rows"""
+        if self._store is None:
+            return None
+        until = self._rows.value(0,0) if self._rows else clock.wallTime()
+        if since >= until:
+            self._older = None
+            return None
+        # align range to a power of two step, so the query only changes when the window moved by a step
+        step  = max( self._interval, 2 ** math.ceil( math.log2( (until - since) / store.MAX_POINTS ) ) )
+        query = ( math.floor(since / step) * step, math.ceil(until / step) * step )
+        if self._older is None or self._older[0] != query:
+            xs, cols = self._store.query( self._section, self._key, query[0], query[1], self._interval )
+            self._older = ( query, (xs, cols), [min(c[0]) for c in cols if c[0]], [max(c[1]) for c in cols if c[1]] )
+        return self._older if self._older[2] else None
+
+    @pyqtProperty('QVariantList',notify=aggregatesChanged)
+    def minimums(self):
+        "Minimum value of every data column, including rows from the store, empty list when there are no rows"
+        values = [self._rows.minimum(col) for col in range(1,self._rows.nofColumns)] if self._rows else []
+        if self._older and self._older[2]:
+            values = [min(v) for v in zip(values, self._older[2])] if values else list(self._older[2])
+        return values
+
+    @pyqtProperty('QVariantList',notify=aggregatesChanged)
+    def maximums(self):
+        "Maximum value of every data column, including rows from the store, empty list when there are no rows"
+        values = [self._rows.maximum(col) for col in range(1,self._rows.nofColumns)] if self._rows else []
+        if self._older and self._older[3]:
+            values = [max(v) for v in zip(values, self._older[3])] if values else list(self._older[3])
+        return values
+
+    @pyqtProperty('QVariantList',notify=aggregatesChanged)
+    def averages(self):
+        "Average value of every data column, empty list when there are no rows"
+        return [self._rows.average(col) for col in range(1,self._rows.nofColumns)] if self._rows else []
+
+    def rowCount(self,parent=QModelIndex()):
+        if parent.isValid():
+            return 0 # rows have no children
         return len(self._rows)
 
-    def columnCount(self,idx):
-        if self._rows:
-            return len(self._rows[0])
-        return 0
+    def columnCount(self,parent=QModelIndex()):
+        if parent.isValid():
+            return 0 # rows have no children
+        return self._rows.nofColumns
 
     def data(self, idx, role=Qt.DisplayRole):
         if not idx.isValid():
             return None
         if idx.row() >= len(self._rows):
             return None
-        row = self._rows[idx.row()]
-        if idx.column() >= len(row):
+        if idx.column() >= self._rows.nofColumns:
             return None
         if role == Qt.DisplayRole:
-            return row[idx.column()]
+            return self._rows.value(idx.row(),idx.column())
 
     @pyqtProperty(int,notify=durationChanged)
     def duration(self):
@@ -84,4 +214,10 @@ class HistoryModel(QAbstractItemModel):
     def duration(self, secs):
         if secs != self._duration:
             self._duration = secs
+            capacity = self._capacity(self._duration)
+            nofDropped = len(self._rows) - capacity
+            self._dropRows( nofDropped )
+            self._rows.resize( capacity )
             self.durationChanged.emit( self._duration )
+            if nofDropped > 0:
+                self.aggregatesChanged.emit()
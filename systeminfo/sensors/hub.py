@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Collect sensor values of a tick into one snapshot and distribute it to sensor info objects.
+"""
+import logging
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtCore import pyqtSlot, pyqtSignal
+
+from systeminfo                   import profiling
+from systeminfo.toolbox           import WorkerSingleton
+from systeminfo.sensors           import clock
+from systeminfo.sensors.dispatch  import KeyedDispatcher
+from systeminfo.sensors.history   import HistoryModel
+from systeminfo.sensors.snapshot  import Snapshot
+from systeminfo.sensors.trigger   import TriggerSingleton
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SnapshotSingleton(QObject):
+    """Collects the sections sampled by the sensor singletons during one tick of the trigger
+    and emits them as one immutable snapshot when the tick is finished."""
+
+    snapshotTaken = pyqtSignal(object) # signal gets emitted once per tick with Snapshot of sampled sensors
+
+    store    = None # HistoryStore recording every snapshot, if any
+    exporter = None # MetricsExporter serving latest values of every snapshot, if any
+
+    instance = None
+
+    @staticmethod
+    def get():
+        "Get singleton instance"
+        if SnapshotSingleton.instance == None:
+            SnapshotSingleton.instance = SnapshotSingleton()
+            WorkerSingleton.get().registerSingleton( SnapshotSingleton.instance )
+        return SnapshotSingleton.instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sections = {}
+        TriggerSingleton.get().tickFinished.connect( self._onTickFinished )
+
+    @staticmethod
+    def setStore(store):
+        "Record every snapshot in given HistoryStore, histories page in older data from it"
+        SnapshotSingleton.store = store
+
+    @staticmethod
+    def setExporter(exporter):
+        "Serve latest values of every snapshot by given MetricsExporter"
+        SnapshotSingleton.exporter = exporter
+
+    def add(self, **sections):
+        "Add sections of current tick by name of field in Snapshot"
+        self._sections.update( sections )
+
+    @pyqtSlot()
+    def _onTickFinished(self):
+        if not self._sections:
+            return
+        snapshot = Snapshot( time=clock.wallTime(), **self._sections )
+        self._sections = {}
+        store = SnapshotSingleton.store
+        if store is not None:
+            try:
+                store.pushSnapshot( snapshot )
+            except OSError as e:
+                LOGGER.error("SnapshotSingleton: Failed to record snapshot: {}".format(e))
+        exporter = SnapshotSingleton.exporter
+        if exporter is not None:
+            exporter.push( snapshot )
+        self.snapshotTaken.emit( snapshot )
+
+
+class SensorHub(QObject):
+    """Receives the snapshot of every tick in the GUI thread and distributes its sections
+    to the sensor info objects, so only one event per tick crosses threads.
+    Keeps one history per sensor series, shared by all info objects showing that series."""
+
+    HISTORIES = { "cpu":     ( 2, TriggerSingleton.TRIGGER_CPU ), # number of data columns and trigger per series
+                  "nofProc": ( 1, TriggerSingleton.TRIGGER_PROC ),
+                  "mem":     ( 2, TriggerSingleton.TRIGGER_MEM ),
+                  "disk":    ( 2, TriggerSingleton.TRIGGER_DISK ),
+                  "netIo":   ( 2, TriggerSingleton.TRIGGER_NET ) }
+
+    snapshotReceived  = pyqtSignal(object) # signal gets emitted for every received Snapshot
+    cpuUpdated        = pyqtSignal() # signal gets emitted whenever CPU load data has been updated
+    nofCpuChanged     = pyqtSignal(int)
+    nofProcChanged    = pyqtSignal(int)
+    memUpdated        = pyqtSignal(object) # signal gets emitted with MemSection whenever memory data has been updated
+    disksChanged      = pyqtSignal('QStringList')
+    interfacesChanged = pyqtSignal()
+    partitionsChanged = pyqtSignal()
+
+    instance = None
+
+    @staticmethod
+    def get():
+        "Get singleton instance, living in the thread of the first caller"
+        if SensorHub.instance == None:
+            SensorHub.instance = SensorHub()
+        return SensorHub.instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._nofCpu      = 0
+        self._nofProc     = 0
+        self._disks       = []
+        self._interfaces  = []
+        self._partitions  = []
+        self._dispatchers = { "cpu":        KeyedDispatcher(self),
+                              "disk":       KeyedDispatcher(self),
+                              "netIo":      KeyedDispatcher(self),
+                              "netUp":      KeyedDispatcher(self),
+                              "partitions": KeyedDispatcher(self) }
+        self._histories   = { series: {} for series in SensorHub.HISTORIES } # series -> { key -> HistoryModel }
+        SnapshotSingleton.get().snapshotTaken.connect( self._onSnapshotTaken )
+
+    def dispatcher(self, section):
+        "Get dispatcher of values by key for given section name ( cpu, disk, netIo, netUp, partitions )"
+        return self._dispatchers[section]
+
+    def history(self, series, key=None):
+        """Get shared history of given series ( cpu, nofProc, mem, disk, netIo ), where key is
+        the cpu index, disk or interface name of keyed series. Gets created on first request."""
+        histories = self._histories[series]
+        if key not in histories:
+            nofCols, trigger = SensorHub.HISTORIES[series]
+            histories[key] = HistoryModel(nofCols=nofCols,interval=TriggerSingleton.interval(trigger),
+                                          store=SnapshotSingleton.store,section=series,key=key,parent=self)
+        return histories[key]
+
+    def _pushHistories(self, series, section):
+        for key, history in self._histories[series].items():
+            values = section.get(key)
+            if values is not None:
+                history.pushData( *values )
+
+    @property
+    def nofCpu(self):
+        return self._nofCpu
+
+    @property
+    def nofProc(self):
+        return self._nofProc
+
+    @property
+    def disks(self):
+        return self._disks
+
+    @property
+    def interfaces(self):
+        return self._interfaces
+
+    @property
+    def partitions(self):
+        return self._partitions
+
+    @pyqtSlot(object)
+    @profiling.timed("SensorHub.distribute")
+    def _onSnapshotTaken(self, snapshot):
+        if snapshot.cpu is not None:
+            if snapshot.cpu.nofCpu != self._nofCpu:
+                self._nofCpu = snapshot.cpu.nofCpu
+                self.nofCpuChanged.emit( self._nofCpu )
+            self._dispatchers["cpu"].dispatch( snapshot.cpu )
+            self._pushHistories( "cpu", snapshot.cpu )
+        if snapshot.nofProc is not None:
+            if snapshot.nofProc != self._nofProc:
+                self._nofProc = snapshot.nofProc
+                self.nofProcChanged.emit( self._nofProc )
+            for history in self._histories["nofProc"].values():
+                history.pushData( snapshot.nofProc )
+        if snapshot.cpu is not None:
+            self.cpuUpdated.emit()
+        if snapshot.mem is not None:
+            self.memUpdated.emit( snapshot.mem )
+            for history in self._histories["mem"].values():
+                history.pushData( snapshot.mem.vmemPercent, snapshot.mem.swapmemPercent )
+        if snapshot.disk is not None:
+            disks = sorted( [d for d in snapshot.disk.names if d], key=lambda d: d.lower() )
+            if disks != self._disks:
+                self._disks = disks
+                self.disksChanged.emit( self._disks )
+            self._dispatchers["disk"].dispatch( snapshot.disk )
+            self._pushHistories( "disk", snapshot.disk )
+        if snapshot.netUp is not None:
+            interfaces = list( snapshot.netUp.names )
+            if interfaces != self._interfaces:
+                self._interfaces = interfaces
+                self.interfacesChanged.emit()
+            self._dispatchers["netUp"].dispatch( snapshot.netUp )
+        if snapshot.netIo is not None:
+            self._dispatchers["netIo"].dispatch( snapshot.netIo )
+            self._pushHistories( "netIo", snapshot.netIo )
+        if snapshot.partitions is not None:
+            partitions = list( snapshot.partitions.names )
+            if partitions != self._partitions:
+                self._partitions = partitions
+                self.partitionsChanged.emit()
+            self._dispatchers["partitions"].dispatch( snapshot.partitions )
+        self.snapshotReceived.emit( snapshot )
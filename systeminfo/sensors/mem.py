@@ -29,17 +29,42 @@ from PyQt5.QtCore import pyqtSlot, pyqtSignal, pyqtProperty
 from PyQt5.QtCore import QObject
 from PyQt5.QtQml  import qmlRegisterType
 
-import psutil
-
 from systeminfo.ui      import resources  # @UnusedImport Only need this to get access to embedded Qt resources
-from systeminfo.toolbox import bytesToText
-from systeminfo.sensors.history import HistoryModel
-from systeminfo.sensors.trigger import TriggerSingleton
+from systeminfo.toolbox import bytesToText, WorkerSingleton
+from systeminfo.sensors.history  import HistoryModel
+from systeminfo.sensors.hub      import SnapshotSingleton, SensorHub
+from systeminfo.sensors.samplers import MemSampler
+from systeminfo.sensors.trigger  import TriggerSingleton
 
 
 LOGGER = logging.getLogger(__name__)
 
 
+class MemSingleton(QObject):
+    "Samples memory information in worker thread"
+
+    instance = None
+
+    @staticmethod
+    def get():
+        "Get singleton instance"
+        if MemSingleton.instance == None:
+            MemSingleton.instance = MemSingleton()
+            WorkerSingleton.get().registerSingleton( MemSingleton.instance )
+        return MemSingleton.instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sampler = MemSampler()
+        TriggerSingleton.get().triggered.connect( self._onTriggered )
+
+    @pyqtSlot(str)
+    def _onTriggered(self,trigger):
+        if trigger != TriggerSingleton.TRIGGER_MEM:
+            return
+        SnapshotSingleton.get().add( **self._sampler.sample() )
+
+
 class MemInfo(QObject):
     "Contains memory information"
 
@@ -59,21 +84,15 @@ class MemInfo(QObject):
         self._vmemAvailBytes = 0
         self._vmemAvailText  = ""
         self._swapmemPercent = 0
-        self._history = HistoryModel(nofCols=2,parent=self)
-        TriggerSingleton.get().triggered.connect( self._onTriggered )
-
-    @pyqtSlot(int)
-    def _onTriggered(self,trigger):
-        if trigger != TriggerSingleton.TRIGGER_SLOW:
-            return
-        vmem    = psutil.virtual_memory()
-        swapmem = psutil.swap_memory()
-        LOGGER.info("MemInfo: {:5.1f}% vmem {:5.1f}% swapmem".format(vmem.percent,swapmem.percent))
-        self._setVmemPercent( vmem.percent )
-        self._setVmemAvailBytes( vmem.available )
-        self._setVmemAvailText( bytesToText(float(vmem.available)) )
-        self._setSwapmemPercent( swapmem.percent )
-        self._history.pushData( vmem.percent, swapmem.percent )
+        MemSingleton.get()
+        SensorHub.get().memUpdated.connect( self._onMemUpdated )
+
+    @pyqtSlot(object)
+    def _onMemUpdated(self,mem):
+        self._setVmemPercent( mem.vmemPercent )
+        self._setVmemAvailBytes( mem.vmemAvailBytes )
+        self._setVmemAvailText( bytesToText(float(mem.vmemAvailBytes)) )
+        self._setSwapmemPercent( mem.swapmemPercent )
         self.updated.emit()
 
     @pyqtProperty(float,notify=vmemPercentChanged)
@@ -114,4 +133,4 @@ class MemInfo(QObject):
 
     @pyqtProperty(HistoryModel,constant=True)
     def history(self):
-        return self._history
+        return SensorHub.get().history( "mem" )
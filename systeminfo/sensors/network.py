@@ -21,7 +21,6 @@ Copyright 2017 Manuel Koch
 
 System info related to network interfaces.
 """
-import datetime
 import logging
 
 from PyQt5.QtCore import Qt
@@ -29,25 +28,19 @@ from PyQt5.QtCore import pyqtSlot, pyqtSignal, pyqtProperty
 from PyQt5.QtCore import QObject
 from PyQt5.QtQml  import qmlRegisterType
 
-import psutil
-
 from systeminfo.ui      import resources  # @UnusedImport Only need this to get access to embedded Qt resources
 from systeminfo.toolbox import WorkerSingleton, bytesToText
-from systeminfo.sensors.history import HistoryModel
-from systeminfo.sensors.trigger import TriggerSingleton
+from systeminfo.sensors.history  import HistoryModel
+from systeminfo.sensors.hub      import SnapshotSingleton, SensorHub
+from systeminfo.sensors.samplers import NetSampler
+from systeminfo.sensors.trigger  import TriggerSingleton
 
 
 LOGGER = logging.getLogger(__name__)
 
 
 class NetworkInterfaceSingleton(QObject):
-    "Contains network interface information singleton"
-
-    updated           = pyqtSignal() # signal gets emitted whenever CPU load data has been updated
-    interfacesChanged = pyqtSignal()
-    ioChanged         = pyqtSignal(str,int,int) # signal gets emitted for recv bytes %2 and sent bytes %3 for selected network interface %1
-                                                # empty interface = sum of all interfaces
-    isUpChanged       = pyqtSignal(str,bool) # signal gets emitted for up-state of selected network interface %1
+    "Samples network interface information in worker thread"
 
     instance = None
 
@@ -61,47 +54,14 @@ class NetworkInterfaceSingleton(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._lastCounters  = None
-        self._lastTimestamp = None
-        self._interfaces    = []
+        self._sampler = NetSampler()
         TriggerSingleton.get().triggered.connect( self._onTriggered )
 
-    @pyqtSlot(int)
+    @pyqtSlot(str)
     def _onTriggered(self,trigger):
-        if trigger != TriggerSingleton.TRIGGER_SLOW:
+        if trigger != TriggerSingleton.TRIGGER_NET:
             return
-        now = datetime.datetime.now()
-        stats = psutil.net_if_stats()
-        for interface, stat in stats.items():
-            self.isUpChanged.emit(interface,stat.isup)
-        counters = psutil.net_io_counters(pernic=True)
-        if self._lastCounters:
-            dt = now - self._lastTimestamp
-            allRecvBytes  = 0
-            allSentBytes = 0
-            for interface, counter in counters.items():
-                if not interface in self._lastCounters:
-                    continue
-                recvBytes = int( (counter.bytes_recv - self._lastCounters[interface].bytes_recv) / dt.total_seconds() )
-                sentBytes = int( (counter.bytes_sent - self._lastCounters[interface].bytes_sent) / dt.total_seconds() )
-                allRecvBytes += recvBytes
-                allSentBytes += sentBytes
-                LOGGER.info("NetworkInterfaceSingleton: {:9d} recv, {:9d} sent for {}".format(recvBytes,sentBytes,interface))
-                self.ioChanged.emit(interface,recvBytes,sentBytes)
-            LOGGER.info("NetworkInterfaceSingleton: {:9d} recv, {:9d} sent for all".format(allRecvBytes,allSentBytes))
-            self.ioChanged.emit("",allRecvBytes,allSentBytes)
-        self._lastTimestamp = now
-        self._lastCounters  = counters
-        self._setInterfaces( list(stats.keys()) )
-
-    @pyqtProperty('QStringList',notify=interfacesChanged)
-    def interfaces(self):
-        return self._interfaces
-
-    def _setInterfaces(self, interfaces):
-        if interfaces != self._interfaces:
-            self._interfaces = interfaces
-            self.interfacesChanged.emit()
+        SnapshotSingleton.get().add( **self._sampler.sample() )
 
 
 class NetworkInterfacesInfo(QObject):
@@ -115,20 +75,12 @@ class NetworkInterfacesInfo(QObject):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._interfaces = []
-        NetworkInterfaceSingleton.get().interfacesChanged.connect( self.interfacesChanged )
-
-    @pyqtSlot(int)
-    def _onTriggered(self,trigger=TriggerSingleton.TRIGGER_SLOW):
-        if trigger != TriggerSingleton.TRIGGER_SLOW:
-            return
-        interfaces = list(psutil.net_if_addrs().keys())
-        interfaces.sort( key=lambda k: k.lower() )
-        self._setInterfaces( interfaces )
+        NetworkInterfaceSingleton.get()
+        SensorHub.get().interfacesChanged.connect( self.interfacesChanged )
 
     @pyqtProperty('QStringList',notify=interfacesChanged)
     def interfaces(self):
-        return NetworkInterfaceSingleton.get().interfaces
+        return SensorHub.get().interfaces
 
 
 class NetworkInterfaceInfo(QObject):
@@ -155,25 +107,18 @@ class NetworkInterfaceInfo(QObject):
         self._recvText  = ""
         self._sentBytes = 0
         self._sentText  = ""
-        self._history   = HistoryModel(nofCols=2,parent=self)
-        NetworkInterfaceSingleton.get().ioChanged.connect(self._onIoChanged)
-        NetworkInterfaceSingleton.get().isUpChanged.connect(self._onIsUpChanged)
+        NetworkInterfaceSingleton.get()
+        SensorHub.get().dispatcher("netIo").subscribe( self._name, self, self._onIoChanged )
+        SensorHub.get().dispatcher("netUp").subscribe( self._name, self, self._onIsUpChanged )
 
-    @pyqtSlot("QString",int,int)
-    def _onIoChanged(self,name,recvBytes,sentBytes):
-        if name != self._name:
-            return
+    def _onIoChanged(self,recvBytes,sentBytes):
         self._setRecvBytes(recvBytes)
         self._setRecvText( "{}/sec".format(bytesToText(float(recvBytes))) )
         self._setSentBytes(sentBytes)
         self._setSentText( "{}/sec".format(bytesToText(float(sentBytes))) )
         self._setIsBusy( (recvBytes+sentBytes) != 0 )
-        self._history.pushData( recvBytes, sentBytes )
 
-    @pyqtSlot(str,bool)
-    def _onIsUpChanged(self,name,isUp):
-        if name != self._name:
-            return
+    def _onIsUpChanged(self,isUp):
         self._setIsUp( isUp )
 
     @pyqtProperty(str,notify=nameChanged)
@@ -183,7 +128,11 @@ class NetworkInterfaceInfo(QObject):
     @name.setter
     def name(self, name):
         if name != self._name:
+            SensorHub.get().dispatcher("netIo").unsubscribe( self._name, self )
+            SensorHub.get().dispatcher("netUp").unsubscribe( self._name, self )
             self._name = name
+            SensorHub.get().dispatcher("netIo").subscribe( self._name, self, self._onIoChanged )
+            SensorHub.get().dispatcher("netUp").subscribe( self._name, self, self._onIsUpChanged )
             self.nameChanged.emit( self._name )
 
     @pyqtProperty(bool,notify=isUpChanged)
@@ -240,6 +189,6 @@ class NetworkInterfaceInfo(QObject):
             self._sentText = sentText
             self.sentTextChanged.emit( self._sentText )
 
-    @pyqtProperty(HistoryModel,constant=True)
+    @pyqtProperty(HistoryModel,notify=nameChanged)
     def history(self):
-        return self._history
+        return SensorHub.get().history( "netIo", self._name )
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Count processes using the cheapest source available.
+"""
+import logging
+import os
+
+import psutil
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ProcessCounter(object):
+    """Counts processes of the system. Available sources are
+
+    - "pids"  : process directories in /proc, without creating a list of pids ( Linux only )
+    - "tasks" : total number of scheduling entities from /proc/loadavg, i.e. processes and their
+                threads, in O(1) independent of number of processes ( Linux only )
+    - "psutil": length of psutil.pids()
+
+    Source "auto" uses "pids" where available, falling back to "psutil" otherwise.
+    Only "tasks" is cheap on hosts with many processes, "pids" and "psutil" both scan /proc
+    in O(processes), "pids" just avoids creating a list. Linux has no O(1) source that counts
+    processes only, so "auto" prefers being accurate.
+    """
+
+    SOURCES = ( "auto", "pids", "tasks", "psutil" )
+
+    PROC = "/proc" # directory of procfs
+
+    defaultSource = "auto" # source used when none is given, e.g. selected from command line
+
+    def __init__(self, source=None):
+        source = source or ProcessCounter.defaultSource
+        assert source in ProcessCounter.SOURCES
+        if source == "auto":
+            source = "pids" if os.path.isfile( os.path.join(ProcessCounter.PROC, "self", "stat") ) else "psutil"
+        if source != "psutil" and not os.path.isfile( os.path.join(ProcessCounter.PROC, "loadavg") ):
+            LOGGER.warning("ProcessCounter: Source {} not available, using psutil".format(source))
+            source = "psutil"
+        self._source = source
+        self._count  = { "pids":   self._countPids,
+                         "tasks":  self._countTasks,
+                         "psutil": self._countPsutil }[source]
+
+    @property
+    def source(self):
+        return self._source
+
+    def count(self):
+        "Get current number of processes"
+        return self._count()
+
+    @staticmethod
+    def _countPids():
+        nof = 0
+        with os.scandir( ProcessCounter.PROC ) as entries:
+            for entry in entries:
+                if entry.name.isdigit():
+                    nof += 1
+        return nof
+
+    @staticmethod
+    def _countTasks():
+        # e.g. "0.20 0.18 0.12 1/80 11206", 4th field is running/total scheduling entities
+        with open( os.path.join(ProcessCounter.PROC, "loadavg"), "rb" ) as f:
+            return int( f.read().split()[3].split(b"/")[1] )
+
+    @staticmethod
+    def _countPsutil():
+        return len(psutil.pids())
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Fixed capacity ring buffer of rows stored in columns of doubles.
+"""
+from array import array
+from collections import deque
+
+
+class SlidingAggregate(object):
+    """Minimum, maximum and sum of a sliding window of values, where values enter at the end
+    and leave at the start of the window. Candidates for the extremes are kept in monotonic deques,
+    so maintaining the aggregate is amortized O(1) per value."""
+
+    def __init__(self):
+        self._mins  = deque() # ( sequence number, value ) with ascending values
+        self._maxs  = deque() # ( sequence number, value ) with descending values
+        self._sum   = 0.0
+        self._first = 0 # sequence number of first value in window
+        self._next  = 0 # sequence number of next appended value
+
+    def __len__(self):
+        return self._next - self._first
+
+    def append(self, value):
+        "Add value at end of window"
+        seq = self._next
+        self._next += 1
+        while self._mins and self._mins[-1][1] >= value:
+            self._mins.pop()
+        self._mins.append( (seq,value) )
+        while self._maxs and self._maxs[-1][1] <= value:
+            self._maxs.pop()
+        self._maxs.append( (seq,value) )
+        self._sum += value
+
+    def popleft(self, value):
+        "Remove given value, which has to be the value at start of window"
+        seq = self._first
+        self._first += 1
+        if self._mins[0][0] == seq:
+            self._mins.popleft()
+        if self._maxs[0][0] == seq:
+            self._maxs.popleft()
+        if self._first == self._next:
+            self._sum = 0.0 # don't accumulate rounding errors beyond an empty window
+        else:
+            self._sum -= value
+
+    @property
+    def minimum(self):
+        return self._mins[0][1] if self._mins else None
+
+    @property
+    def maximum(self):
+        return self._maxs[0][1] if self._maxs else None
+
+    @property
+    def average(self):
+        return self._sum / len(self) if len(self) else None
+
+
+class RingBuffer(object):
+    """Buffer of rows, where column 0 is the timestamp and following columns are data.
+    Every column is a preallocated array of doubles, rows are addressed by head index and size.
+    Pushing a row and dropping the oldest rows never moves any data, when capacity is
+    exhausted the oldest row gets overwritten. Minimum, maximum and average of every data column
+    are maintained while rows are pushed and dropped."""
+
+    def __init__(self, capacity, nofCols):
+        "Construct buffer for given max number of rows, each with a timestamp and given number of data columns"
+        self._capacity = max(1, int(capacity))
+        self._columns    = [self._allocate(self._capacity) for _ in range(1 + nofCols)]
+        self._aggregates = [SlidingAggregate() for _ in range(nofCols)]
+        self._head       = 0 # physical index of oldest row
+        self._size       = 0
+
+    @staticmethod
+    def _allocate(capacity):
+        return array('d', bytes(8 * capacity))
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def nofColumns(self):
+        "Number of columns including the timestamp column"
+        return len(self._columns)
+
+    def _physical(self, row):
+        return (self._head + row) % self._capacity
+
+    def push(self, timestamp, *dataColumns):
+        "Append a new row, returns number of rows that have been dropped to make room for it ( 0 or 1 )"
+        assert len(dataColumns) + 1 == len(self._columns)
+        dropped = 0
+        if self._size == self._capacity:
+            self.drop(1)
+            dropped = 1
+        idx = self._physical(self._size)
+        self._columns[0][idx] = timestamp
+        for col, value in enumerate(dataColumns, 1):
+            self._columns[col][idx] = value
+            self._aggregates[col-1].append(value)
+        self._size += 1
+        return dropped
+
+    def drop(self, nofRows):
+        "Drop given number of oldest rows"
+        nofRows = min(nofRows, self._size)
+        for row in range(nofRows):
+            idx = self._physical(row)
+            for col, aggregate in enumerate(self._aggregates, 1):
+                aggregate.popleft(self._columns[col][idx])
+        self._head  = self._physical(nofRows)
+        self._size -= nofRows
+
+    def nofOlderThan(self, timestamp):
+        "Number of oldest rows with a timestamp before given timestamp, assuming ascending timestamps"
+        timestamps = self._columns[0]
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timestamps[self._physical(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def value(self, row, col):
+        "Get value of given row ( 0 = oldest row ) and column"
+        return self._columns[col][self._physical(row)]
+
+    def last(self, col):
+        "Get value of newest row in given column"
+        return self._columns[col][self._physical(self._size - 1)]
+
+    def minimum(self, col):
+        "Get minimum of values in given data column, None when empty"
+        return self._aggregates[col-1].minimum
+
+    def maximum(self, col):
+        "Get maximum of values in given data column, None when empty"
+        return self._aggregates[col-1].maximum
+
+    def average(self, col):
+        "Get average of values in given data column, None when empty"
+        return self._aggregates[col-1].average
+
+    def column(self, col, first=0):
+        "Get array of values of given column, starting at given row up to the newest row"
+        column = self._columns[col]
+        start  = self._physical(first)
+        end    = start + max(0, self._size - first)
+        if end <= self._capacity:
+            return column[start:end]
+        return column[start:] + column[:end - self._capacity]
+
+    def resize(self, capacity):
+        "Change capacity, keeping the newest rows that fit into new capacity"
+        capacity = max(1, int(capacity))
+        if capacity == self._capacity:
+            return
+        keep = min(self._size, capacity)
+        first = self._size - keep
+        columns = []
+        for column in self._columns:
+            resized = self._allocate(capacity)
+            for row in range(keep):
+                resized[row] = column[self._physical(first + row)]
+            columns.append(resized)
+        self._columns    = columns
+        self._aggregates = [SlidingAggregate() for _ in self._aggregates]
+        for col, aggregate in enumerate(self._aggregates, 1):
+            for row in range(keep):
+                aggregate.append(columns[col][row])
+        self._capacity = capacity
+        self._head     = 0
+        self._size     = keep
+
+
+class ByteRingBuffer(object):
+    """Buffer of rows of bytes with fixed width, e.g. one row of values quantized to 0...255 per sample.
+    All rows live in one contiguous block of memory, pushing a row overwrites the oldest row when
+    capacity is exhausted and never moves any data. The memory may be provided by the caller,
+    e.g. the pixels of an image, so the rows can be drawn without copying them."""
+
+    def __init__(self, capacity, width, data=None):
+        """Construct buffer for given max number of rows, each with given number of bytes,
+        using given writable buffer of capacity*width bytes or a new bytearray"""
+        self._capacity = max(1, int(capacity))
+        self._width    = max(1, int(width))
+        self._data     = bytearray(self._capacity * self._width) if data is None else data
+        assert len(self._data) == self._capacity * self._width
+        self._next     = 0 # physical index of row written by next push
+        self._size     = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def data(self):
+        "Get buffer of all rows in physical order"
+        return self._data
+
+    def push(self, row):
+        "Overwrite next row with given bytes-like object of length width"
+        offset = self._next * self._width
+        self._data[offset:offset+self._width] = row
+        self._next = (self._next + 1) % self._capacity
+        self._size = min(self._size + 1, self._capacity)
+
+    def segments(self):
+        "Get list of ( first physical row, number of rows ) covering all rows from oldest to newest"
+        if self._size < self._capacity:
+            return [ (0, self._size) ] if self._size else []
+        return [ (first, nof) for first, nof in ( (self._next, self._capacity - self._next), (0, self._next) ) if nof ]
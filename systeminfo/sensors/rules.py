@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Rules to select and group devices by name, e.g. to sum all virtual network interfaces into one.
+"""
+import fnmatch
+
+
+KINDS       = ( "disk", "net", "mount" )
+GROUP_KINDS = ( "disk", "net" ) # kinds whose values add up, so devices can be grouped
+
+
+class NameRules(object):
+    """Selects names of devices by include and exclude glob patterns and maps selected names to
+    the name of a group, whose values get aggregated into one item. A name is selected when it
+    matches any include pattern ( or there are none ) and doesn't match any exclude pattern.
+    A selected name matching the pattern of a group is replaced by the name of the first such group."""
+
+    MAX_CACHED = 4096 # cached results of target(), the cache gets cleared when exceeded, e.g. by churn of veth devices
+
+    def __init__(self, include=(), exclude=(), groups=()):
+        "Construct rules of glob patterns, where groups is a sequence of tuples of group name and pattern"
+        self._include = list(include)
+        self._exclude = list(exclude)
+        self._groups  = list(groups)
+        self._targets = {} # cached result of target() by name
+
+    def __bool__(self):
+        return bool( self._include or self._exclude or self._groups )
+
+    def include(self, pattern):
+        self._include.append( pattern )
+        self._targets = {}
+
+    def exclude(self, pattern):
+        self._exclude.append( pattern )
+        self._targets = {}
+
+    def group(self, name, pattern):
+        self._groups.append( ( name, pattern ) )
+        self._targets = {}
+
+    def target(self, name):
+        "Get name of item that values of given name are aggregated into, None when it is not selected"
+        try:
+            return self._targets[name]
+        except KeyError:
+            pass
+        target = None
+        if ( not self._include or any( fnmatch.fnmatchcase(name, p) for p in self._include ) ) and \
+           not any( fnmatch.fnmatchcase(name, p) for p in self._exclude ):
+            target = next( ( group for group, p in self._groups if fnmatch.fnmatchcase(name, p) ), name )
+        if len(self._targets) >= NameRules.MAX_CACHED:
+            self._targets = {}
+        self._targets[name] = target
+        return target
+
+
+defaultRules = { kind: NameRules() for kind in KINDS } # rules used when none are given, e.g. set from command line
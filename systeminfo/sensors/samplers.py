@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Sample system sensors without any dependency on Qt, to be used by the worker thread of
+the GUI as well as in headless mode.
+Every sampler returns the sampled sections by name of field in Snapshot, getting raw values
+from its own backend instance.
+"""
+import logging
+import os
+import queue
+import re
+import select
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+
+import psutil
+
+from systeminfo                   import profiling
+from systeminfo.sensors           import clock
+from systeminfo.sensors.backend   import createBackend, ProcFile
+from systeminfo.sensors.proccount import ProcessCounter
+from systeminfo.sensors.rules     import defaultRules
+from systeminfo.sensors.snapshot  import CpuSection, MemSection, IoSection, UpSection, PartitionSection
+from systeminfo.sensors.trace     import Tracer
+
+
+LOGGER = logging.getLogger(__name__)
+
+TRACE_CPU       = Tracer("cpu")
+TRACE_PROC      = Tracer("proc")
+TRACE_MEM       = Tracer("mem")
+TRACE_DISK      = Tracer("disk")
+TRACE_NET       = Tracer("net")
+TRACE_PARTITION = Tracer("partition")
+
+
+class CpuSampler(object):
+    "Samples load of every cpu"
+
+    def __init__(self, backend=None):
+        self._nofCpu  = 0
+        self._backend = backend or createBackend()
+        self._setNofCpu( len(self._backend.cpuLoads()[0]) )
+
+    @property
+    def nofCpu(self):
+        return self._nofCpu
+
+    def sample(self):
+        with profiling.span("backend.cpuLoads"):
+            usrLoads, sysLoads = self._backend.cpuLoads()
+        usrLoads = array('d', usrLoads)
+        sysLoads = array('d', sysLoads)
+        self._setNofCpu( len(usrLoads) )
+        usrLoads.insert(0, sum(usrLoads) / len(usrLoads))
+        sysLoads.insert(0, sum(sysLoads) / len(sysLoads))
+        if TRACE_CPU.active():
+            for i in range(len(usrLoads)):
+                TRACE_CPU("CpuSampler: [{}] {:5.1f}% {:5.1f}%", i, usrLoads[i], sysLoads[i])
+        return { "cpu": CpuSection(usrLoads,sysLoads) }
+
+    def _setNofCpu(self, nof):
+        if self._nofCpu != nof:
+            self._nofCpu = nof
+            LOGGER.info("CpuSampler: {} CPUs".format(self._nofCpu))
+
+
+class ProcSampler(object):
+    "Samples number of processes"
+
+    def __init__(self, source=None):
+        self._counter = ProcessCounter(source)
+
+    def sample(self):
+        with profiling.span("backend.processes"):
+            nof = self._counter.count()
+        if TRACE_PROC.active():
+            TRACE_PROC("ProcSampler: {} Processes", nof)
+        return { "nofProc": nof }
+
+
+class MemSampler(object):
+    "Samples usage of virtual and swap memory"
+
+    def __init__(self, backend=None):
+        self._backend = backend or createBackend()
+
+    def sample(self):
+        with profiling.span("backend.memory"):
+            mem = MemSection( *self._backend.memory() )
+        if TRACE_MEM.active():
+            TRACE_MEM("MemSampler: {:5.1f}% vmem {:5.1f}% swapmem", mem.vmemPercent, mem.swapmemPercent)
+        return { "mem": mem }
+
+
+def ioRates(counters, lastCounters, dt, rules):
+    """Get tuple of names, bytes in and bytes out per second of the devices selected by rules between
+    two samples of counters, where values of a group of devices are summed. First entry has an empty
+    name and is the sum of all selected devices."""
+    index    = { "": 0 }
+    inBytes  = [0]
+    outBytes = [0]
+    for name, counter in counters.items():
+        target = rules.target(name)
+        if target is None or not name in lastCounters:
+            continue
+        # counters restart at zero when device gets re-created
+        devInBytes  = max( 0, int( (counter[0] - lastCounters[name][0]) / dt ) )
+        devOutBytes = max( 0, int( (counter[1] - lastCounters[name][1]) / dt ) )
+        i = index.get(target)
+        if i is None:
+            i = index[target] = len(inBytes)
+            inBytes.append(0)
+            outBytes.append(0)
+        inBytes[i]  += devInBytes
+        outBytes[i] += devOutBytes
+        inBytes[0]  += devInBytes
+        outBytes[0] += devOutBytes
+    return tuple(index), inBytes, outBytes
+
+
+class DiskSampler(object):
+    """Samples bytes read/written per second of every disk selected by rules, the first sample
+    only records counters"""
+
+    def __init__(self, backend=None, rules=None):
+        self._backend       = backend or createBackend()
+        self._rules         = rules if rules is not None else defaultRules["disk"]
+        self._lastCounters  = None
+        self._lastTimestamp = None
+        self._disks         = []
+
+    def sample(self):
+        with profiling.span("backend.diskCounters"):
+            counters, now = clock.sample( self._backend.diskCounters )
+
+        disks = list( counters.keys() )
+        disks.sort(key=lambda d: d.lower())
+        if self._disks != disks:
+            self._disks = disks
+            LOGGER.info("DiskSampler: Disks {}".format(", ".join(self._disks)))
+
+        sections = {}
+        if self._lastCounters and now > self._lastTimestamp:
+            names, readBytes, writeBytes = ioRates( counters, self._lastCounters,
+                                                    clock.elapsed( self._lastTimestamp, now ), self._rules )
+            if TRACE_DISK.active():
+                for i in range(1,len(names)):
+                    TRACE_DISK("DiskSampler: {:9d} read, {:9d} write for {}", readBytes[i], writeBytes[i], names[i])
+                TRACE_DISK("DiskSampler: {:9d} read, {:9d} write for all", readBytes[0], writeBytes[0])
+            sections["disk"] = IoSection.create( names, readBytes, writeBytes )
+
+        self._lastTimestamp = now
+        self._lastCounters  = counters
+        return sections
+
+
+class NetSampler(object):
+    """Samples up-state and bytes received/sent per second of every network interface selected by rules,
+    the first sample has no rates. A group of interfaces is up when any of them is up."""
+
+    def __init__(self, backend=None, rules=None):
+        self._backend       = backend or createBackend()
+        self._rules         = rules if rules is not None else defaultRules["net"]
+        self._lastCounters  = None
+        self._lastTimestamp = None
+
+    def sample(self):
+        isUp = {}
+        with profiling.span("psutil.net_if_stats"):
+            stats = psutil.net_if_stats()
+        for interface, stat in stats.items():
+            target = self._rules.target(interface)
+            if target is not None:
+                isUp[target] = isUp.get(target, False) or stat.isup
+        netUp = UpSection.create( tuple(isUp.keys()), isUp.values() )
+        netIo = None
+        with profiling.span("backend.netCounters"):
+            counters, now = clock.sample( self._backend.netCounters )
+        if self._lastCounters and now > self._lastTimestamp:
+            names, recvBytes, sentBytes = ioRates( counters, self._lastCounters,
+                                                   clock.elapsed( self._lastTimestamp, now ), self._rules )
+            if TRACE_NET.active():
+                for i in range(1,len(names)):
+                    TRACE_NET("NetSampler: {:9d} recv, {:9d} sent for {}", recvBytes[i], sentBytes[i], names[i])
+                TRACE_NET("NetSampler: {:9d} recv, {:9d} sent for all", recvBytes[0], sentBytes[0])
+            netIo = IoSection.create( names, recvBytes, sentBytes )
+        self._lastTimestamp = now
+        self._lastCounters  = counters
+        return { "netIo": netIo, "netUp": netUp }
+
+
+class MountTable(object):
+    """Mounted partitions of physical devices by mountpoint. On Linux the table gets parsed from
+    /proc/self/mountinfo only when the kernel signals a change of it ( poll() reports POLLPRI ),
+    elsewhere psutil gets asked on every refresh."""
+
+    MOUNTINFO   = "/proc/self/mountinfo"
+    FILESYSTEMS = "/proc/filesystems"
+
+    def __init__(self):
+        self._devices     = {} # mountpoint -> device
+        self._mountpoints = []
+        self._mountinfo   = None
+        self._poll        = None
+        self._parsed      = False
+        try:
+            self._mountinfo = ProcFile( MountTable.MOUNTINFO, 65536 )
+            self._poll      = select.poll()
+            self._poll.register( self._mountinfo, select.POLLPRI | select.POLLERR )
+        except (OSError, AttributeError): # no /proc or no select.poll()
+            self._mountinfo = None
+            self._poll      = None
+
+    @profiling.timed("MountTable.refresh")
+    def refresh(self):
+        "Read current mounted partitions if they may have changed, get True when mountpoints have changed"
+        if self._poll is None:
+            devices = { partition.mountpoint: partition.device for partition in psutil.disk_partitions() }
+        elif self._parsed and not self._poll.poll(0):
+            return False
+        else:
+            devices = self._parseMountinfo()
+            self._parsed = True
+        changed = devices.keys() != self._devices.keys()
+        self._devices = devices
+        if changed:
+            self._mountpoints = sorted( self._devices, key=lambda k: k.lower() )
+        return changed
+
+    @staticmethod
+    def _physicalFilesystems():
+        # e.g. "nodev	sysfs" or "	ext4", like psutil only consider file systems with a device and zfs
+        with open( MountTable.FILESYSTEMS, "rb" ) as f:
+            lines = f.read().splitlines()
+        return { line.split()[-1] for line in lines if line.strip() and ( not line.startswith(b"nodev") or line.endswith(b"zfs") ) }
+
+    @staticmethod
+    def _unescape(field):
+        # space, tab, newline and backslash are escaped as octal, e.g. "\040"
+        return os.fsdecode( re.sub( rb"\\([0-7]{3})", lambda m: bytes( [int(m.group(1), 8)] ), field ) )
+
+    def _parseMountinfo(self):
+        # e.g. "36 35 98:0 /mnt1 /mnt2 rw,noatime master:1 - ext3 /dev/root rw,errors=continue"
+        # with mountpoint in 5th field, and file system type and device following the separator "-"
+        fstypes = self._physicalFilesystems()
+        devices = {}
+        for line in self._mountinfo.read().splitlines():
+            fields = line.split()
+            sep = fields.index(b"-", 6)
+            fstype, device = fields[sep+1], fields[sep+2]
+            if fstype not in fstypes or device == b"none":
+                continue
+            devices[ self._unescape(fields[4]) ] = self._unescape(device)
+        return devices
+
+    @property
+    def mountpoints(self):
+        "Get list of mountpoints, sorted case-insensitive"
+        return self._mountpoints
+
+    def device(self, mountpoint):
+        "Get device of given mountpoint, empty string for unknown mountpoint"
+        return self._devices.get(mountpoint, "")
+
+
+def partitionUsage(path):
+    "Get usage of partition mounted at given path as returned by psutil.disk_usage, None when not available"
+    if sys.platform == "win32" or sys.platform == "cygwin":
+        # need to disable special windows error handling that causes a popup dialog
+        # when drive has been ejected and we try to access it ( e.g. via isdir call ).
+        import win32api
+        oldError = win32api.SetErrorMode( 1 ) # SEM_FAILCRITICALERRORS = 1
+        pathValid = os.path.isdir(path)
+        win32api.SetErrorMode( oldError )
+    else:
+        pathValid = os.path.isdir(path)
+
+    if not pathValid:
+        return None
+    try:
+        with profiling.span("psutil.disk_usage"):
+            usage = psutil.disk_usage(path)
+    except OSError:
+        return None
+    return usage
+
+
+class _PartitionTick(object):
+    "Mountpoints to sample in one tick, taken one by one by the threads of a PartitionSampler"
+
+    def __init__(self, names):
+        self.pending   = deque(names)
+        self.usages    = {} # mountpoint -> usage, None when not available
+        self.nofLeft   = len(names)
+        self.finished  = threading.Event()
+        self.cancelled = False
+        if not names:
+            self.finished.set()
+
+
+class PartitionSampler(object):
+    """Samples usage of every partition of a mount table selected by rules concurrently, without groups
+    as usage of partitions doesn't add up. The mountpoints of a tick are shared by a few daemon threads
+    that take them one by one, so the threads are not joined at exit.
+    A partition whose call doesn't return within the timeout ( e.g. a hung network mount ) is reported
+    as not available and doesn't get sampled again until that call has returned, so it blocks the
+    caller only once. The thread of such a call gets replaced by a new one, until MAX_STUCK threads
+    are stuck, beyond that the remaining partitions only get sampled by threads that return.
+    Partitions not sampled in time without being stuck keep their previous usage."""
+
+    TIMEOUT     = 0.5 # sec to wait for the usage of all partitions
+    NOF_THREADS = 8
+    MAX_STUCK   = 8   # stuck threads that get replaced by a new thread
+
+    def __init__(self, mountTable, timeout=TIMEOUT, rules=None):
+        self._mountTable = mountTable
+        self._rules      = rules if rules is not None else defaultRules["mount"]
+        self._timeout    = timeout
+        self._lock       = threading.Lock()
+        self._ticks      = queue.Queue()
+        self._nofThreads = 0
+        self._inFlight   = {}    # mountpoint -> monotonic sec when its running call started
+        self._stalled    = set() # mountpoints of calls that didn't return within timeout
+        self._usages     = {}    # mountpoint -> usage of previous tick
+
+    def _startThreads(self, stuckAfter):
+        """Start threads until there are enough threads not running a call for more than given sec,
+        get number of started threads"""
+        with self._lock:
+            since  = time.monotonic() - stuckAfter
+            stuck  = sum( 1 for start in self._inFlight.values() if start <= since )
+            wanted = PartitionSampler.NOF_THREADS + min( stuck, PartitionSampler.MAX_STUCK )
+            started = 0
+            while self._nofThreads < wanted:
+                threading.Thread( target=self._work, name="PartitionSampler-{}".format(self._nofThreads), daemon=True ).start()
+                self._nofThreads += 1
+                started += 1
+            return started
+
+    def _work(self):
+        while True:
+            tick = self._ticks.get()
+            while not tick.cancelled:
+                try:
+                    name = tick.pending.popleft()
+                except IndexError:
+                    break
+                with self._lock:
+                    self._inFlight[name] = time.monotonic()
+                try:
+                    usage = partitionUsage( name )
+                except Exception:
+                    usage = None
+                with self._lock:
+                    del self._inFlight[name]
+                    tick.usages[name] = usage
+                    tick.nofLeft -= 1
+                    if not tick.nofLeft:
+                        tick.finished.set()
+                    # retire thread that got replaced while it was stuck
+                    if self._nofThreads > PartitionSampler.NOF_THREADS + len(self._inFlight):
+                        self._nofThreads -= 1
+                        return
+
+    def sample(self):
+        names = tuple( name for name in self._mountTable.mountpoints if self._rules.target(name) is not None )
+        for name in [ name for name in self._stalled if name not in self._inFlight ]:
+            LOGGER.info("PartitionSampler: [{}] responding again".format(name))
+            self._stalled.discard(name)
+
+        # at most one call per mountpoint
+        tick = _PartitionTick( [ name for name in names if name not in self._inFlight ] )
+        self._startThreads( self._timeout )
+        # ticks not taken by threads stuck since are cancelled, drop them so the queue doesn't grow
+        # while they hang, and only queue the tick for threads not running a call
+        while True:
+            try:
+                self._ticks.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            nofIdle = self._nofThreads - len(self._inFlight)
+        for _ in range( nofIdle ):
+            self._ticks.put( tick )
+        # don't wait when all threads are stuck beyond MAX_STUCK
+        timeout = self._timeout if nofIdle > 0 else 0
+        if not tick.finished.wait( timeout / 2 ):
+            # replace threads stuck already, so the remaining mountpoints get sampled in time
+            for _ in range( self._startThreads( self._timeout / 2 ) ):
+                self._ticks.put( tick )
+            tick.finished.wait( timeout / 2 )
+        with self._lock:
+            tick.cancelled = True
+            usages = dict( tick.usages )
+            since  = time.monotonic() - self._timeout
+            stuck  = [ name for name, start in self._inFlight.items() if start <= since and name not in self._stalled ]
+
+        for name in stuck:
+            LOGGER.warning("PartitionSampler: [{}] not responding within {} sec".format(name,self._timeout))
+            self._stalled.add(name)
+        for name in names:
+            if name not in usages and name not in self._stalled:
+                usages[name] = self._usages.get(name) # not sampled in time
+        self._usages = usages
+        if TRACE_PARTITION.active():
+            for name in names:
+                if usages.get(name) is not None:
+                    TRACE_PARTITION("PartitionSampler: [{}] {:5.1f}%", name, usages[name].percent)
+
+        usages = [ usages.get(name) for name in names ]
+        return { "partitions": PartitionSection.create( names,
+                                                        [ self._mountTable.device(name) for name in names ],
+                                                        [ u.percent if u else 0 for u in usages ],
+                                                        [ u.free if u else 0 for u in usages ],
+                                                        [ u is not None for u in usages ] ) }
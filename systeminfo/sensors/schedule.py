@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Schedule of sensors sampling at individual intervals.
+"""
+import logging
+
+
+LOGGER = logging.getLogger(__name__)
+
+TRIGGER_CPU       = "cpu"
+TRIGGER_PROC      = "proc"
+TRIGGER_MEM       = "mem"
+TRIGGER_DISK      = "disk"
+TRIGGER_NET       = "net"
+TRIGGER_MOUNTS    = "mounts"
+TRIGGER_PARTITION = "partition"
+DEFAULT_INTERVALS = { TRIGGER_CPU:       200, # msec between two consecutive triggers
+                      TRIGGER_PROC:      1600,
+                      TRIGGER_MEM:       1600,
+                      TRIGGER_DISK:      1600,
+                      TRIGGER_NET:       1600,
+                      TRIGGER_MOUNTS:    1600,
+                      TRIGGER_PARTITION: 1600 }
+ALL_TRIGGERS      = tuple( sorted(DEFAULT_INTERVALS) )
+MIN_INTERVAL      = 10 # msec, shorter intervals get clamped
+IDLE_BACKOFF      = 5.0 # default factor of intervals while nobody is watching
+COALESCE          = 20 # msec, triggers due within that time are run in the same tick
+
+
+class Schedule(object):
+    """Keeps the time when each named job is due next, given an interval in msec per job.
+    All intervals get multiplied by a backoff factor, e.g. to sample less often while idle.
+    Times are msec of a monotonic clock."""
+
+    def __init__(self, intervals, now):
+        "Construct schedule for dict of job name to interval in msec, all jobs are due at given time"
+        self._intervals = dict(intervals)
+        self._backoff   = 1.0
+        self._due       = { name: now for name in self._intervals }
+
+    def interval(self, name):
+        "Get effective interval of job in msec, including backoff"
+        return self._intervals[name] * self._backoff
+
+    @property
+    def backoff(self):
+        return self._backoff
+
+    def setBackoff(self, factor, now):
+        "Change backoff factor of all intervals, rescheduling jobs that are due later than new interval"
+        self._backoff = max(1.0, factor)
+        for name in self._due:
+            self._due[name] = min( self._due[name], now + self.interval(name) )
+
+    def nextDue(self):
+        "Get time when next job is due"
+        return min( self._due.values() )
+
+    def due(self, now):
+        """Get names of jobs that are due at given time, and schedule their next run.
+        A job that missed more than one interval is scheduled relative to given time,
+        so delayed ticks don't cause a burst of runs."""
+        names = []
+        for name, due in self._due.items():
+            if due <= now:
+                names.append( name )
+                due += self.interval(name)
+                self._due[name] = due if due > now else now + self.interval(name)
+        return names
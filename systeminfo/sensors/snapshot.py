@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Immutable snapshot of all sensor values sampled in one tick.
+"""
+from array import array
+from collections import namedtuple
+
+
+class CpuSection(namedtuple("CpuSection", "usrLoads sysLoads")):
+    "Load and system load in percent per cpu, where cpu 0 is the avg of all CPUs"
+
+    __slots__ = ()
+
+    @property
+    def nofCpu(self):
+        return len(self.usrLoads) - 1
+
+    def get(self, cpu):
+        "Get tuple of load and system load of given cpu, None for unknown cpu"
+        if 0 <= cpu < len(self.usrLoads):
+            return ( self.usrLoads[cpu], self.sysLoads[cpu] )
+        return None
+
+    def toRecord(self):
+        "Get dict of lists of loads, suitable for serialization"
+        return { "usr": list(self.usrLoads), "sys": list(self.sysLoads) }
+
+
+class MemSection(namedtuple("MemSection", "vmemPercent vmemAvailBytes swapmemPercent")):
+    "Used virtual memory in percent, available virtual memory in bytes and used swap memory in percent"
+
+    __slots__ = ()
+
+    def toRecord(self):
+        "Get dict of values, suitable for serialization"
+        return dict( self._asdict() )
+
+
+class IoSection(namedtuple("IoSection", "names index inBytes outBytes")):
+    """Bytes per second received/read and sent/written per device, where names is the tuple of
+    device names and index maps a name to its position in the arrays of bytes.
+    Device with empty name is the sum of all devices."""
+
+    __slots__ = ()
+
+    @staticmethod
+    def create(names, inBytes, outBytes):
+        "Create section from tuple of names and corresponding sequences of bytes"
+        return IoSection( names, {name: i for i, name in enumerate(names)},
+                          array('q', inBytes), array('q', outBytes) )
+
+    def get(self, name):
+        "Get tuple of in/out bytes of given device, None for unknown device"
+        i = self.index.get(name)
+        if i is None:
+            return None
+        return ( self.inBytes[i], self.outBytes[i] )
+
+    def toRecord(self, inName="in", outName="out"):
+        "Get dict of bytes by given names per device, suitable for serialization"
+        return { name: { inName: self.inBytes[i], outName: self.outBytes[i] } for i, name in enumerate(self.names) }
+
+
+class UpSection(namedtuple("UpSection", "names index isUp")):
+    "Up-state per network interface, where index maps a name to its position in isUp"
+
+    __slots__ = ()
+
+    @staticmethod
+    def create(names, isUp):
+        "Create section from tuple of names and corresponding sequence of up-states"
+        return UpSection( names, {name: i for i, name in enumerate(names)}, tuple(isUp) )
+
+    def get(self, name):
+        "Get tuple of up-state of given interface, None for unknown interface"
+        i = self.index.get(name)
+        if i is None:
+            return None
+        return ( self.isUp[i], )
+
+
+class PartitionSection(namedtuple("PartitionSection", "names index disks percents freeBytes avail")):
+    """Usage per partition, where names is the tuple of mountpoints and index maps a mountpoint
+    to its position in the tuples of disk device, used percent, free bytes and availability"""
+
+    __slots__ = ()
+
+    @staticmethod
+    def create(names, disks, percents, freeBytes, avail):
+        "Create section from tuple of mountpoints and corresponding sequences of values"
+        return PartitionSection( names, {name: i for i, name in enumerate(names)},
+                                 tuple(disks), tuple(percents), tuple(freeBytes), tuple(avail) )
+
+    def get(self, name):
+        "Get tuple of disk, percent, free bytes and availability of given mountpoint, None for unknown mountpoint"
+        i = self.index.get(name)
+        if i is None:
+            return None
+        return ( self.disks[i], self.percents[i], self.freeBytes[i], self.avail[i] )
+
+    def toRecord(self):
+        "Get dict of values per mountpoint, suitable for serialization"
+        return { name: { "disk": self.disks[i], "percent": self.percents[i],
+                         "freeBytes": self.freeBytes[i], "avail": self.avail[i] }
+                 for i, name in enumerate(self.names) }
+
+
+class Snapshot(namedtuple("Snapshot", "time cpu nofProc mem disk netIo netUp partitions")):
+    """Sensor values of one tick, every field is None when not sampled in that tick.
+    time is the wall-clock time of the tick, cpu is a CpuSection, nofProc the number of processes,
+    mem a MemSection, disk and netIo are IoSection, netUp is an UpSection and partitions
+    a PartitionSection."""
+
+    __slots__ = ()
+
+    def toRecord(self):
+        "Get dict of sampled values, suitable for serialization e.g. as JSON"
+        record = { "time": self.time }
+        if self.cpu is not None:
+            record["cpu"] = self.cpu.toRecord()
+        if self.nofProc is not None:
+            record["nofProc"] = self.nofProc
+        if self.mem is not None:
+            record["mem"] = self.mem.toRecord()
+        if self.disk is not None:
+            record["disk"] = self.disk.toRecord("readBytes", "writeBytes")
+        if self.netIo is not None:
+            record["netIo"] = self.netIo.toRecord("recvBytes", "sentBytes")
+        if self.netUp is not None:
+            record["netUp"] = dict( zip(self.netUp.names, self.netUp.isUp) )
+        if self.partitions is not None:
+            record["partitions"] = self.partitions.toRecord()
+        return record
+
+Snapshot.__new__.__defaults__ = (None,) * len(Snapshot._fields)
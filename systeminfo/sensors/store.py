@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Persistent store of sensor histories in append-only, memory-mapped segment files.
+"""
+import bisect
+import errno
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+try:
+    import fcntl
+except ImportError: # not available on Windows, store doesn't get locked there
+    fcntl = None
+
+from systeminfo.sensors import clock
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+TIERS         = ( ( "raw", 0,    3600 ), # name, resolution and retention in seconds, resolution 0 keeps every sample
+                  ( "10s", 10,   24*3600 ),
+                  ( "1m",  60,   7*24*3600 ),
+                  ( "1h",  3600, 365*24*3600 ) )
+SECTIONS      = { "cpu":     2, # number of columns per key of every stored section of a snapshot
+                  "nofProc": 1,
+                  "mem":     2,
+                  "disk":    2,
+                  "netIo":   2 }
+SEGMENT_BYTES = 4 * 1024 * 1024 # size of a segment file
+MAX_POINTS    = 2000 # queries use the finest tier that returns at most that many records
+MAGIC         = b"SIH1"
+HEADER        = struct.Struct("<4sIIIQ") # magic, header size, columns per key, aggregates per column, number of records
+COUNT         = struct.Struct("<Q") # number of records, at the end of the header
+PAGE          = 4096
+LOCK_FILE     = "lock" # file in directory of store, locked while the store is open
+ROLLUP_FILE   = "rollups.json" # file in directory of section, keeps unfinished buckets of rollups between runs
+
+
+class Segment(object):
+    """File of records of doubles, appended in time order and accessed through a memory map.
+    The header holds the keys of the section and the number of records written. A record is a
+    timestamp followed by one block of values per aggregate ( the raw value, or minimum, maximum
+    and average ), each block containing the values of all columns of all keys."""
+
+    def __init__(self, path, keys=None, nofCols=1, nofAggregates=1, capacity=None):
+        "Open segment file at given path, or create it for given keys and max number of records when capacity is given"
+        if capacity is not None:
+            self._create( path, keys, nofCols, nofAggregates, capacity )
+        self.path  = path
+        self._file = open(path, "r+b")
+        self._map  = mmap.mmap(self._file.fileno(), 0)
+        magic, headerSize, self.nofCols, self.nofAggregates, self._count = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Not a history segment: {}".format(path))
+        self.keys     = json.loads( bytes(self._map[HEADER.size:headerSize]).rstrip(b"\0") )
+        self._index   = { key: i for i, key in enumerate(self.keys) }
+        self.width    = 1 + len(self.keys) * self.nofCols * self.nofAggregates
+        self._view    = memoryview(self._map)
+        self._values  = self._view[headerSize:].cast("d")
+        self.capacity = len(self._values) // self.width
+
+    @staticmethod
+    def _create(path, keys, nofCols, nofAggregates, capacity):
+        keysText   = json.dumps( list(keys) ).encode("utf-8")
+        headerSize = int( math.ceil( (HEADER.size + len(keysText) + 1) / PAGE ) * PAGE )
+        width      = 1 + len(keys) * nofCols * nofAggregates
+        with open(path, "wb") as f:
+            f.write( HEADER.pack( MAGIC, headerSize, nofCols, nofAggregates, 0 ) )
+            f.write( keysText )
+            f.truncate( headerSize + capacity * width * 8 )
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def isFull(self):
+        return self._count >= self.capacity
+
+    def timestamp(self, row):
+        return self._values[row * self.width]
+
+    def append(self, record):
+        "Append record, given as array of doubles of segment's width"
+        offset = self._count * self.width
+        self._values[offset:offset+self.width] = record
+        self._count += 1
+        COUNT.pack_into( self._map, HEADER.size - COUNT.size, self._count )
+
+    def find(self, timestamp):
+        "Get index of first record not older than given timestamp"
+        return bisect.bisect_left( range(self._count), timestamp, key=self.timestamp )
+
+    def offset(self, key, col, aggregate=0):
+        "Get position of value within a record for column of given key and aggregate, None for unknown key"
+        idx = self._index.get(key)
+        if idx is None:
+            return None
+        return 1 + ( aggregate * len(self.keys) + idx ) * self.nofCols + col
+
+    def column(self, first, last, offset):
+        "Get list of values at given position of records first...last-1"
+        return self._values[ first*self.width+offset : last*self.width : self.width ].tolist()
+
+    def close(self):
+        if self._map is None:
+            return
+        if getattr(self, "_values", None) is not None:
+            self._values.release()
+            self._view.release()
+            self._values = None
+        self._map.close()
+        self._file.close()
+        self._map = None
+
+
+class Rollup(object):
+    "Minimum, maximum and sum of every value of the records pushed within the current time bucket"
+
+    def __init__(self, resolution):
+        self._resolution = resolution
+        self._bucket     = None # start of current bucket
+        self._keys       = None
+        self._count      = 0
+
+    def add(self, timestamp, keys, values):
+        """Add values of given keys, returns tuple of keys and record of previous bucket
+        when given values start a new bucket, otherwise None"""
+        bucket = math.floor( timestamp / self._resolution ) * self._resolution
+        finished = None
+        if self._bucket is not None and ( bucket != self._bucket or keys != self._keys ):
+            finished = ( self._keys, self.record() )
+        if self._bucket is None or finished:
+            self._bucket = bucket
+            self._keys   = keys
+            self._mins   = array("d", values)
+            self._maxs   = array("d", values)
+            self._sums   = array("d", values)
+            self._count  = 1
+            return finished
+        mins, maxs, sums = self._mins, self._maxs, self._sums
+        for i, value in enumerate(values):
+            if value < mins[i]:
+                mins[i] = value
+            if value > maxs[i]:
+                maxs[i] = value
+            sums[i] += value
+        self._count += 1
+        return None
+
+    def state(self):
+        "Get current bucket as JSON serializable dict, None without any values"
+        if self._bucket is None:
+            return None
+        return { "bucket": self._bucket, "keys": self._keys, "count": self._count,
+                 "mins": self._mins.tolist(), "maxs": self._maxs.tolist(), "sums": self._sums.tolist() }
+
+    def restore(self, state):
+        "Continue bucket of given dict as returned by state()"
+        self._bucket = state["bucket"]
+        self._keys   = state["keys"]
+        self._count  = state["count"]
+        self._mins   = array("d", state["mins"])
+        self._maxs   = array("d", state["maxs"])
+        self._sums   = array("d", state["sums"])
+
+    def record(self):
+        "Get record of current bucket, i.e. its start followed by minimums, maximums and averages"
+        return array("d", [self._bucket]) + self._mins + self._maxs + array("d", (s / self._count for s in self._sums))
+
+
+class Tier(object):
+    """Segments of one section at one resolution, named by the timestamp of their first record.
+    Only the segment currently appended to is kept open, segments older than the retention get deleted."""
+
+    def __init__(self, directory, resolution, retention, segmentBytes=SEGMENT_BYTES):
+        self.resolution    = resolution
+        self.retention     = retention
+        self._directory    = directory
+        self._segmentBytes = segmentBytes
+        self._tail         = None
+        os.makedirs( directory, exist_ok=True )
+        self._paths = sorted( os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".seg") )
+
+    @staticmethod
+    def _start(path):
+        "Get timestamp of first record of segment at given path"
+        return int( os.path.basename(path)[:-4] ) / 1000
+
+    def _openTail(self, timestamp, keys, nofCols, nofAggregates):
+        if self._tail is not None:
+            self._tail.close()
+            self._tail = None
+        if self._paths:
+            try:
+                tail = Segment( self._paths[-1] )
+                if not tail.isFull and tail.keys == keys and tail.nofCols == nofCols and tail.nofAggregates == nofAggregates:
+                    self._tail = tail
+                    return
+                tail.close()
+            except (OSError, ValueError, struct.error) as e:
+                LOGGER.warning("Tier: Ignoring segment {}: {}".format(self._paths[-1], e))
+        start = int(timestamp * 1000)
+        if self._paths:
+            start = max( start, int(self._start(self._paths[-1]) * 1000) + 1 )
+        path = os.path.join( self._directory, "{:015d}.seg".format(start) )
+        width    = 1 + len(keys) * nofCols * nofAggregates
+        capacity = max( 16, self._segmentBytes // (width * 8) )
+        self._tail = Segment( path, keys, nofCols, nofAggregates, capacity )
+        self._paths.append( path )
+        self._expire( timestamp )
+
+    def _expire(self, now):
+        "Delete segments whose records are all older than retention"
+        while len(self._paths) > 1 and self._start(self._paths[1]) < now - self.retention:
+            try:
+                os.remove( self._paths[0] )
+            except OSError as e:
+                LOGGER.warning("Tier: Failed to delete segment {}: {}".format(self._paths[0], e))
+            del self._paths[0]
+
+    def append(self, timestamp, keys, nofCols, nofAggregates, record):
+        "Append record of given keys, starting a new segment when necessary"
+        tail = self._tail
+        if tail is None or tail.isFull or tail.keys != keys:
+            self._openTail( timestamp, keys, nofCols, nofAggregates )
+        self._tail.append( record )
+
+    def query(self, key, since, until):
+        """Get tuple of timestamps and list of ( minimums, maximums, averages ) per column
+        of given key for records within since...until"""
+        xs   = []
+        cols = None
+        for i, path in enumerate(self._paths):
+            if self._start(path) >= until or ( i+1 < len(self._paths) and self._start(self._paths[i+1]) <= since ):
+                continue
+            segment = self._tail if self._tail is not None and self._tail.path == path else None
+            try:
+                segment = segment or Segment( path )
+            except (OSError, ValueError, struct.error) as e:
+                LOGGER.warning("Tier: Ignoring segment {}: {}".format(path, e))
+                continue
+            try:
+                if segment.offset(key, 0) is None:
+                    continue
+                first = segment.find( since )
+                last  = segment.find( until )
+                if first >= last:
+                    continue
+                if cols is None:
+                    cols = [ ( [], [], [] ) if segment.nofAggregates > 1 else ( [], ) * 3 for _ in range(segment.nofCols) ]
+                xs.extend( segment.column(first, last, 0) )
+                for col, aggregates in enumerate(cols):
+                    for aggregate in range(segment.nofAggregates):
+                        aggregates[aggregate].extend( segment.column(first, last, segment.offset(key, col, aggregate)) )
+            finally:
+                if segment is not self._tail:
+                    segment.close()
+        return xs, cols or []
+
+    def close(self):
+        if self._tail is not None:
+            self._tail.close()
+            self._tail = None
+
+
+class HistoryStore(object):
+    """Records every series of the sections of snapshots persistently in a directory, with one
+    subdirectory per section and tier. Raw records are kept for an hour, rollups with minimum,
+    maximum and average of every value are kept per 10 seconds, minute and hour for longer.
+    Pushing and querying may happen in different threads. The directory is locked while the store is
+    open, opening it in another process fails with OSError."""
+
+    def __init__(self, directory, segmentBytes=SEGMENT_BYTES):
+        os.makedirs( directory, exist_ok=True )
+        self._lockFile = open( os.path.join(directory, LOCK_FILE), "a" )
+        if fcntl is not None:
+            try:
+                fcntl.flock( self._lockFile, fcntl.LOCK_EX | fcntl.LOCK_NB )
+            except OSError:
+                self._lockFile.close()
+                raise OSError( errno.EBUSY, "History store in use by another process", directory )
+        self._directory    = directory
+        self._segmentBytes = segmentBytes
+        self._lock         = threading.Lock()
+        self._sections     = {} # section -> ( list of Tier, list of Rollup of tiers except raw )
+        self._latest       = {} # section -> timestamp of latest pushed record
+        self._closed       = False
+        LOGGER.info("HistoryStore: Recording to {}".format(directory))
+
+    def _section(self, section):
+        if section not in self._sections:
+            tiers = [ Tier( os.path.join(self._directory, section, name), resolution, retention, self._segmentBytes )
+                      for name, resolution, retention in TIERS ]
+            rollups = [ Rollup(tier.resolution) for tier in tiers[1:] ]
+            self._restoreRollups( section, rollups )
+            self._sections[section] = ( tiers, rollups )
+        return self._sections[section]
+
+    def _restoreRollups(self, section, rollups):
+        "Continue unfinished buckets saved by close(), the file gets removed so they can't be recorded twice"
+        path = os.path.join( self._directory, section, ROLLUP_FILE )
+        try:
+            with open(path, encoding="utf-8") as f:
+                states = json.load(f)
+            os.remove( path )
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            LOGGER.warning("HistoryStore: Ignoring unfinished rollups {}: {}".format(path, e))
+            return
+        for rollup, state in zip(rollups, states):
+            if state is not None:
+                rollup.restore( state )
+
+    def _saveRollups(self, section, rollups):
+        "Save unfinished buckets of rollups, to be continued by next store of same directory"
+        path = os.path.join( self._directory, section, ROLLUP_FILE )
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump( [ rollup.state() for rollup in rollups ], f )
+            os.replace( path + ".tmp", path )
+        except OSError as e:
+            LOGGER.warning("HistoryStore: Failed to save unfinished rollups {}: {}".format(path, e))
+
+    def push(self, section, timestamp, keys, values):
+        "Record values of given section and timestamp, as flat sequence of all columns of every key"
+        nofCols = SECTIONS[section]
+        keys = list(keys)
+        assert len(values) == len(keys) * nofCols
+        with self._lock:
+            if self._closed:
+                return
+            if timestamp < self._latest.get(section, timestamp):
+                return # wall-clock stepped back, keep records in time order until it catches up
+            self._latest[section] = timestamp
+            tiers, rollups = self._section( section )
+            tiers[0].append( timestamp, keys, nofCols, 1, array("d", [timestamp]) + array("d", values) )
+            for tier, rollup in zip(tiers[1:], rollups):
+                finished = rollup.add( timestamp, keys, values )
+                if finished:
+                    tier.append( finished[1][0], finished[0], nofCols, 3, finished[1] )
+
+    def pushSnapshot(self, snapshot):
+        "Record all stored sections of given Snapshot"
+        if snapshot.cpu is not None:
+            self.push( "cpu", snapshot.time, range(len(snapshot.cpu.usrLoads)),
+                       [ v for loads in zip(snapshot.cpu.usrLoads, snapshot.cpu.sysLoads) for v in loads ] )
+        if snapshot.nofProc is not None:
+            self.push( "nofProc", snapshot.time, [None], [snapshot.nofProc] )
+        if snapshot.mem is not None:
+            self.push( "mem", snapshot.time, [None], [snapshot.mem.vmemPercent, snapshot.mem.swapmemPercent] )
+        for name, section in ( ("disk", snapshot.disk), ("netIo", snapshot.netIo) ):
+            if section is not None:
+                self.push( name, snapshot.time, section.names,
+                           [ v for bytes_ in zip(section.inBytes, section.outBytes) for v in bytes_ ] )
+
+    def query(self, section, key, since, until, interval=None, maxPoints=MAX_POINTS):
+        """Get recorded values of given key of section within since...until, from the finest tier
+        that still keeps values of that range and needs at most given number of records, where
+        interval is the expected seconds between raw records. Returns tuple of list of timestamps
+        and list of ( minimums, maximums, averages ) per column, being the same list for raw records."""
+        span = until - since
+        now  = clock.wallTime()
+        with self._lock:
+            if self._closed:
+                return [], []
+            tiers, _ = self._section( section )
+            chosen = tiers[-1]
+            for tier in tiers:
+                resolution = tier.resolution or interval
+                if resolution and span / resolution <= maxPoints and since >= now - tier.retention:
+                    chosen = tier
+                    break
+            return chosen.query( key, since, until )
+
+    def close(self):
+        "Save the unfinished buckets of rollups, to be continued when opened again, and close all segments"
+        with self._lock:
+            if self._closed:
+                return
+            for section, (tiers, rollups) in self._sections.items():
+                self._saveRollups( section, rollups )
+                for tier in tiers:
+                    tier.close()
+            self._sections = {}
+            self._closed   = True
+            self._lockFile.close()
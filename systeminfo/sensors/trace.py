@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Trace values sampled by the sensors, at debug level of one logger per sensor below "systeminfo.trace".
+
+Tracing is disabled by default, so the samplers only check one flag per tick. A tracer formats
+its message only when a handler actually emits it, and may trace only every n-th tick, e.g.
+
+    if TRACE_CPU.active():
+        TRACE_CPU("CpuSampler: [{}] {:5.1f}%", i, load)
+"""
+import logging
+
+
+SENSORS = ( "cpu", "disk", "mem", "net", "partition", "proc" )
+
+enabled = set() # names of sensors being traced, e.g. selected from command line
+every   = 1     # trace every n-th tick of a sensor only
+
+
+def configure(sensors, nth=1):
+    "Trace given sensors ( all of them for 'all' ) every nth tick"
+    global every
+    enabled.clear()
+    enabled.update( SENSORS if "all" in sensors else sensors )
+    every = max( 1, nth )
+
+
+class Message(object):
+    "Log message formatted like str.format() when it gets emitted"
+
+    __slots__ = ( "fmt", "args" )
+
+    def __init__(self, fmt, args):
+        self.fmt  = fmt
+        self.args = args
+
+    def __str__(self):
+        return self.fmt.format( *self.args )
+
+
+class Tracer(object):
+    "Traces sampled values of one sensor"
+
+    def __init__(self, sensor):
+        self.sensor    = sensor
+        self.logger    = logging.getLogger( "systeminfo.trace." + sensor )
+        self._nofTicks = 0
+
+    def active(self):
+        "Check whether values of current tick get traced, call once per tick"
+        if self.sensor not in enabled:
+            return False
+        self._nofTicks += 1
+        if (self._nofTicks - 1) % every:
+            return False
+        return self.logger.isEnabledFor( logging.DEBUG )
+
+    def __call__(self, fmt, *args):
+        "Trace message formatted from given arguments like str.format(), when active"
+        self.logger.debug( Message( fmt, args ), stacklevel=2 )
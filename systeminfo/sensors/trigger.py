@@ -22,37 +22,47 @@ Copyright 2017 Manuel Koch
 Using timer singleton to sync updates of sensors.
 """
 import logging
+import time
 
 from PyQt5.QtCore import QObject
 from PyQt5.QtCore import QTimer
 from PyQt5.QtCore import pyqtSignal, pyqtSlot
 
-from systeminfo.toolbox import WorkerSingleton
+from systeminfo                  import profiling
+from systeminfo.toolbox          import WorkerSingleton
+from systeminfo.sensors          import schedule
 
 
 LOGGER = logging.getLogger(__name__)
 
 
 class TriggerSingleton(QObject):
-    "A timer to sync updates of sensors"
+    """A scheduler to sync updates of sensors, where every sensor is triggered at its own interval.
+    Intervals get multiplied by a backoff factor while the main window is not in foreground."""
 
-    TRIGGER_FAST = 1
-    TRIGGER_MED  = 4
-    TRIGGER_SLOW = 8
-    ALL_TRIGGERS = ( TRIGGER_FAST, TRIGGER_MED, TRIGGER_SLOW )
+    TRIGGER_CPU       = schedule.TRIGGER_CPU
+    TRIGGER_PROC      = schedule.TRIGGER_PROC
+    TRIGGER_MEM       = schedule.TRIGGER_MEM
+    TRIGGER_DISK      = schedule.TRIGGER_DISK
+    TRIGGER_NET       = schedule.TRIGGER_NET
+    TRIGGER_MOUNTS    = schedule.TRIGGER_MOUNTS
+    TRIGGER_PARTITION = schedule.TRIGGER_PARTITION
 
-    triggered = pyqtSignal(int) # signal gets emitted frequently with given trigger identifier
+    intervals   = dict(schedule.DEFAULT_INTERVALS) # configured msec between two consecutive triggers
+    idleBackoff = schedule.IDLE_BACKOFF # configured factor of intervals while main window is not in foreground
+
+    triggered    = pyqtSignal(str) # signal gets emitted frequently with given trigger identifier
+    tickFinished = pyqtSignal() # signal gets emitted after all triggers of a tick have been emitted
 
     instance = None
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._count = -1
+        self._schedule = schedule.Schedule( TriggerSingleton.intervals, self._now() )
         self._refreshTimer = QTimer(self)
-        self._refreshTimer.setSingleShot(False)
-        self._refreshTimer.setInterval(200)
-        self._refreshTimer.start()
+        self._refreshTimer.setSingleShot(True)
         self._refreshTimer.timeout.connect( self._onTriggered )
+        self._refreshTimer.start( TriggerSingleton.intervals[TriggerSingleton.TRIGGER_CPU] )
 
     @staticmethod
     def get():
@@ -62,9 +72,43 @@ class TriggerSingleton(QObject):
             WorkerSingleton.get().registerSingleton( TriggerSingleton.instance )
         return TriggerSingleton.instance
 
+    @staticmethod
+    def configure(intervals=None, idleBackoff=None):
+        "Configure msec between triggers by dict of trigger identifier, and backoff factor while idle"
+        for trigger, msec in (intervals or {}).items():
+            if trigger not in schedule.DEFAULT_INTERVALS:
+                raise ValueError("Unknown trigger {}".format(trigger))
+            TriggerSingleton.intervals[trigger] = max(schedule.MIN_INTERVAL, int(msec))
+        if idleBackoff is not None:
+            TriggerSingleton.idleBackoff = max(1.0, float(idleBackoff))
+        LOGGER.info("TriggerSingleton: Intervals {}, idle backoff {}".format(TriggerSingleton.intervals,TriggerSingleton.idleBackoff))
+
+    @staticmethod
+    def interval(trigger):
+        "Get seconds between two consecutive emissions of given trigger identifier while in foreground"
+        return TriggerSingleton.intervals[trigger] / 1000
+
+    @staticmethod
+    def _now():
+        return time.monotonic() * 1000
+
+    @pyqtSlot(bool)
+    def setForeground(self, foreground):
+        "Sample at configured intervals while in foreground, otherwise back off"
+        backoff = 1.0 if foreground else TriggerSingleton.idleBackoff
+        if backoff != self._schedule.backoff:
+            LOGGER.info("TriggerSingleton: Backoff {}".format(backoff))
+            self._schedule.setBackoff( backoff, self._now() )
+            self._startTimer()
+
+    def _startTimer(self):
+        self._refreshTimer.start( max(0, int(self._schedule.nextDue() - self._now())) )
+
     @pyqtSlot()
     def _onTriggered(self):
-        self._count += 1
-        for t in TriggerSingleton.ALL_TRIGGERS:
-            if self._count % t == 0:
+        for t in self._schedule.due( self._now() + schedule.COALESCE ):
+            with profiling.span("trigger." + t):
                 self.triggered.emit(t)
+        with profiling.span("snapshot"):
+            self.tickFinished.emit()
+        self._startTimer()
@@ -20,32 +20,11 @@ Copyright 2017 Manuel Koch
 ----------------------------
 Helper functions.
 """
-import datetime
 import inspect
 
 from PyQt5.QtCore import QObject, QThread
 
 
-class MeasureContext(object):
-    "Measure time spent in current scope"
-
-    def __init__(self,msg):
-        self._msg   = msg
-        self._start = None
-        self._end   = None
-
-    def __enter__(self):
-        "Enter context"
-        self._start = datetime.datetime.now()
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        "Leave context"
-        self._end = datetime.datetime.now()
-        dt = self._end - self._start
-        print("{}: {}".format(self._msg,dt))
-        return False
-
-
 class WorkerSingleton(QObject):
 
     instance = None
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Heatmap of the load of every cpu over time.
+"""
+import logging
+import math
+
+from PyQt5.QtCore   import QPointF, QRectF
+from PyQt5.QtCore   import pyqtSlot, pyqtSignal, pyqtProperty
+from PyQt5.QtGui    import QColor, QImage, QPainter, QTransform
+from PyQt5.QtQml    import qmlRegisterType
+from PyQt5.QtQuick  import QQuickPaintedItem
+
+from systeminfo                     import profiling
+from systeminfo.sensors.cpu         import CpuSingleton
+from systeminfo.sensors.hub         import SensorHub
+from systeminfo.sensors.ringbuffer  import ByteRingBuffer
+from systeminfo.sensors.trigger     import TriggerSingleton
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+PERCENT_RANGES = [ (0,"green"), (80,"yellow"), (90,"orange"), (95,"red") ] # start percent and color, like PercentSensor
+
+
+def _colorTable():
+    "Get list of 256 rgb values, where index is load in percent getting brighter towards the end of its range"
+    table = []
+    for percent in range(256):
+        color = QColor( [ c for start, c in PERCENT_RANGES if start <= min(percent,100) ][-1] )
+        factor = 0.25 + 0.75 * min(percent,100) / 100
+        table.append( QColor.fromRgbF( color.redF()*factor, color.greenF()*factor, color.blueF()*factor ).rgb() )
+    return table
+
+
+class CpuHeatmap(QQuickPaintedItem):
+    """Shows load of every cpu as one row of colored pixels, with the newest sample in the rightmost column.
+    Loads of each snapshot get quantized to a row of bytes in one ring buffer covering the
+    selected duration, living in the pixels of an indexed image. Painting transposes that image
+    and draws it in at most two parts, so a new sample never moves or copies any data."""
+
+    durationChanged = pyqtSignal(float)
+
+    COLORS = None # color table of image, created on first use
+
+    @classmethod
+    def registerToQml(cls):
+        qmlRegisterType(cls, 'SystemInfo', 1, 0, 'CpuHeatmap')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._duration = 60.0 # seconds of loads shown
+        self._buffer   = None
+        self._image    = None
+        self._padding  = b"" # bytes appended to every row of loads to fill a line of the image
+        self.setFillColor( QColor("black") )
+        CpuSingleton.get()
+        SensorHub.get().snapshotReceived.connect( self._onSnapshotReceived )
+
+    @pyqtProperty(float,notify=durationChanged)
+    def duration(self):
+        return self._duration
+
+    @duration.setter
+    def duration(self,seconds):
+        if self._duration != seconds:
+            self._duration = seconds
+            self._buffer   = None
+            self._image    = None
+            self.durationChanged.emit( self._duration )
+            self.update()
+
+    def _createBuffer(self, nofCpu):
+        if CpuHeatmap.COLORS is None:
+            CpuHeatmap.COLORS = _colorTable()
+        capacity = math.ceil( self._duration / TriggerSingleton.interval(TriggerSingleton.TRIGGER_CPU) )
+        self._image = QImage( nofCpu, capacity, QImage.Format_Indexed8 )
+        self._image.setColorTable( CpuHeatmap.COLORS )
+        pixels = self._image.bits()
+        pixels.setsize( self._image.byteCount() )
+        self._buffer  = ByteRingBuffer( capacity, self._image.bytesPerLine(), memoryview(pixels) )
+        self._padding = bytes( self._image.bytesPerLine() - nofCpu )
+
+    @pyqtSlot(object)
+    def _onSnapshotReceived(self, snapshot):
+        loads = snapshot.cpu
+        if loads is None or not loads.nofCpu:
+            return
+        if self._image is None or self._image.width() != loads.nofCpu:
+            self._createBuffer( loads.nofCpu )
+        self._buffer.push( bytes( map( round, loads.usrLoads[1:] ) ) + self._padding )
+        if self.isVisible():
+            self.update()
+
+    @profiling.timed("CpuHeatmap.paint")
+    def paint(self, painter):
+        if self._buffer is None or not len(self._buffer):
+            return
+        # image has one row per sample and one column per cpu, map its rows to x and columns to y
+        sx = self.width() / self._buffer.capacity
+        sy = self.height() / self._image.width()
+        painter.setRenderHint( QPainter.SmoothPixmapTransform, False )
+        painter.setTransform( QTransform( 0, sy, sx, 0, 0, 0 ), True )
+        row = self._buffer.capacity - len(self._buffer)
+        for first, nof in self._buffer.segments():
+            painter.drawImage( QPointF(0,row), self._image, QRectF(0,first,self._image.width(),nof) )
+            row += nof
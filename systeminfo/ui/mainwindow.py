@@ -25,21 +25,28 @@ import logging
 import os
 
 from PyQt5 import QtCore
-from PyQt5.QtCore import qInstallMessageHandler, QSize, Qt, pyqtSlot
+from PyQt5.QtCore import qInstallMessageHandler, QSize, Qt, pyqtSlot, pyqtSignal
 from PyQt5.QtCore import QThread
 from PyQt5.QtCore import QUrl
 from PyQt5.QtCore import QTimer
 from PyQt5.QtCore import QSettings
-from PyQt5.QtGui import QGuiApplication, QIcon, QPixmap, QPainter, QColor, QFont, QTextOption
+from PyQt5.QtGui import QGuiApplication, QIcon, QPixmap, QPainter, QColor, QFont, QTextOption, QWindow
 from PyQt5.QtWidgets import QSystemTrayIcon
 from PyQt5.QtQuick import QQuickView
 
 from systeminfo.ui import resources  # @UnusedImport Only need this to get access to embedded Qt resources
 from systeminfo.ui.trayicon import CpuTrayIcon, VmemTrayIcon
+from systeminfo.ui.heatmap import CpuHeatmap
+from systeminfo.ui.profileinfo import ProfileInfo
 from systeminfo.sensors.cpu import CpuInfo
 from systeminfo.sensors.mem import MemInfo
 from systeminfo.sensors.disk import PartitionsInfo, PartitionInfo, DisksInfo, DiskInfo
 from systeminfo.sensors.network import NetworkInterfacesInfo, NetworkInterfaceInfo
+from systeminfo.sensors import schedule
+from systeminfo.sensors.trigger import TriggerSingleton
+from systeminfo.sensors.hub import SnapshotSingleton
+from systeminfo.sensors.store import HistoryStore
+from systeminfo.sensors.export import MetricsExporter
 
 LOGGER = logging.getLogger(__name__)
 
@@ -57,8 +64,20 @@ def messageHandler(msgType, context, msg):
 
 
 class MainWindow(QQuickView):
+
+    foregroundChanged = pyqtSignal(bool) # signal gets emitted when window gets shown or hidden/minimized
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._foreground = False
+        self.visibilityChanged.connect( self._onVisibilityChanged )
+
+    @pyqtSlot(QWindow.Visibility)
+    def _onVisibilityChanged(self, visibility):
+        foreground = visibility not in (QWindow.Hidden, QWindow.Minimized)
+        if foreground != self._foreground:
+            self._foreground = foreground
+            self.foregroundChanged.emit( foreground )
 
     @pyqtSlot()
     def toggleVisiblity(self):
@@ -68,8 +87,11 @@ class MainWindow(QQuickView):
             self.setVisible(True)
 
 
-def run_gui():
-    "Run GUI application"
+def run_gui(intervals=None, idleBackoff=None, storePath=None, exportAddress=None):
+    """Run GUI application, using given msec between triggers by trigger identifier and
+    backoff factor while window is not in foreground, overriding values from settings.
+    History of sensors gets recorded in store at given directory, if any, and latest values
+    get served as metrics at given address, if any."""
     # Customize application
     app = QGuiApplication([])
     app.setOrganizationName("MKO")
@@ -81,6 +103,7 @@ def run_gui():
     qInstallMessageHandler(messageHandler)
 
     CpuInfo.registerToQml()
+    CpuHeatmap.registerToQml()
     MemInfo.registerToQml()
     PartitionsInfo.registerToQml()
     PartitionInfo.registerToQml()
@@ -97,7 +120,41 @@ def run_gui():
     h = settings.value("height", 600)
     settings.endGroup()
 
+    settings.beginGroup("Trigger")
+    configured = { t: settings.value(t, type=int) for t in schedule.ALL_TRIGGERS if settings.contains(t) }
+    configured.update( intervals or {} )
+    if idleBackoff is None and settings.contains("idleBackoff"):
+        idleBackoff = settings.value("idleBackoff", type=float)
+    settings.endGroup()
+    TriggerSingleton.configure( configured, idleBackoff )
+
+    store = None
+    if storePath:
+        try:
+            store = HistoryStore( storePath )
+        except OSError as e:
+            LOGGER.error("Failed to open history store: {}".format(e))
+            return 1
+
+    exporter = None
+    if exportAddress:
+        exporter = MetricsExporter()
+        try:
+            exporter.serve( exportAddress )
+        except OSError as e:
+            LOGGER.error("Failed to serve metrics at {}: {}".format(exportAddress, e))
+            if store is not None:
+                store.close()
+            return 1
+
+    SnapshotSingleton.setStore( store )
+    SnapshotSingleton.setExporter( exporter )
+
     view = MainWindow()
+    profiler = ProfileInfo(view)
+    view.rootContext().setContextProperty( "profiler", profiler )
+    view.rootContext().setContextProperty( "historyRecorded", store is not None )
+    view.foregroundChanged.connect( TriggerSingleton.get().setForeground )
     view.engine().setOutputWarningsToStandardError(True)
     view.setResizeMode(QQuickView.SizeRootObjectToView)
     view.setSource(QUrl('qrc:/qml/main.qml'));
@@ -127,6 +184,14 @@ def run_gui():
     cpuTrayIcon.hide()
     memTrayIcon.hide()
 
+    if store is not None:
+        SnapshotSingleton.setStore( None )
+        store.close()
+
+    if exporter is not None:
+        SnapshotSingleton.setExporter( None )
+        exporter.close()
+
     settings = QSettings()
     settings.beginGroup("MainWindow")
     settings.setValue("x", view.x())
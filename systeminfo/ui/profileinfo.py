@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+This file is part of Systeminfo.
+
+Systeminfo is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Systeminfo is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Systeminfo. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright 2017 Manuel Koch
+
+----------------------------
+
+Expose measured spans to QML, for an overlay and for measuring paints of QML items.
+"""
+import time
+
+from PyQt5.QtCore   import QObject, QTimer
+from PyQt5.QtCore   import pyqtSlot, pyqtSignal, pyqtProperty
+
+from systeminfo import profiling
+
+
+class ProfileInfo(QObject):
+    """Report of all spans as text, refreshed every second while profiling is enabled.
+    QML measures its own spans by calling begin() and end() with the same name."""
+
+    textChanged = pyqtSignal(str) # signal gets emitted when report got refreshed
+
+    REFRESH_INTERVAL = 1000 # msec between refreshs of report
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text   = ""
+        self._starts = {} # span name -> nsec when it began
+        self._timer  = QTimer(self)
+        self._timer.setInterval( ProfileInfo.REFRESH_INTERVAL )
+        self._timer.timeout.connect( self._refresh )
+        if profiling.enabled:
+            self._timer.start()
+
+    @pyqtProperty(bool,constant=True)
+    def enabled(self):
+        return profiling.enabled
+
+    @pyqtProperty(str,notify=textChanged)
+    def text(self):
+        return self._text
+
+    @pyqtSlot()
+    def _refresh(self):
+        text = profiling.formatReport()
+        if text != self._text:
+            self._text = text
+            self.textChanged.emit( self._text )
+
+    @pyqtSlot(str)
+    def begin(self, name):
+        if profiling.enabled:
+            self._starts[name] = time.perf_counter_ns()
+
+    @pyqtSlot(str)
+    def end(self, name):
+        start = self._starts.pop( name, None )
+        if start is not None:
+            profiling.record( name, time.perf_counter_ns() - start )
@@ -23,11 +23,13 @@ Tray icons with system information.
 """
 import logging
 import datetime
+from collections import deque
 
 from PyQt5.QtCore    import QSize, Qt, pyqtSlot
 from PyQt5.QtGui     import QIcon, QPixmap, QPainter, QColor, QFont
 from PyQt5.QtWidgets import QSystemTrayIcon
 
+from systeminfo              import profiling
 from systeminfo.ui           import resources  # @UnusedImport Only need this to get access to embedded Qt resources
 from systeminfo.sensors.cpu  import CpuInfo
 from systeminfo.sensors.mem  import MemInfo
@@ -40,39 +42,72 @@ TRAY_ICON_SIZE = 16 # assuming tray icon of 16x16 pixels
 
 
 class PercentTrayIcon(QSystemTrayIcon):
+    """Tray icon showing a bar graph of recent percentage values and the most recent value as text.
+    Bars are kept in a persistent pixmap that gets scrolled by one column per value, the text
+    is drawn from cached glyphs, and the icon only gets replaced when its content changed."""
+
+    GLYPHS = {} # text -> pixmap of text on transparent background, shared by all tray icons
 
     def __init__(self,title,color,parent=None):
         "Construct a tray icon that updates when a percentage value changes, using selected named color for graph"
         super().__init__(parent)
-        self._history = [(0,0)]*TRAY_ICON_SIZE
-        self._color = QColor(color)
+        self._history = deque([0]*TRAY_ICON_SIZE, maxlen=TRAY_ICON_SIZE) # height of bars in pixels
+        self._time    = 0 # second of most recent value
+        self._text    = "0"
+        self._shown   = None # history and text of current icon
+        self._color   = QColor(color)
+        self._bars    = QPixmap(QSize(TRAY_ICON_SIZE,TRAY_ICON_SIZE))
+        self._bars.fill( Qt.black )
         self._render()
         self.setToolTip(title)
 
     def _addPercentage(self,percent):
         "Add a new percentage value ( 0...100 ) to history of values, only using the first value within a second"
         now = int( datetime.datetime.now().timestamp() + 0.5 )
-        if now == self._history[-1][0]:
+        if now == self._time:
             return
-        self._history.pop(0)
-        self._history.append( (now,percent) )
+        self._time = now
+        s = TRAY_ICON_SIZE-1
+        self._history.append( int(percent*s/100+0.5) )
+        self._text = "{:0.0f}".format(percent)
+        self._scrollBars()
         self._render()
 
-    def _render(self):
-        "Render new tray icon and apply it to system tray"
-        pixmap = QPixmap(QSize(TRAY_ICON_SIZE,TRAY_ICON_SIZE))
-        painter = QPainter(pixmap)
-        painter.fillRect( pixmap.rect(), Qt.black )
-        painter.setPen( self._color )
+    def _scrollBars(self):
+        "Scroll bar graph by one column to the left and draw bar of most recent value into last column"
         s = TRAY_ICON_SIZE-1
-        for x, data in enumerate(self._history):
-            y = data[1]
-            painter.drawLine(x,s,x,s-int(y*s/100+0.5))
-        if self._history:
-            y = self._history[-1][1]
+        self._bars.scroll( -1, 0, self._bars.rect() )
+        painter = QPainter(self._bars)
+        painter.fillRect( s, 0, 1, TRAY_ICON_SIZE, Qt.black )
+        painter.setPen( self._color )
+        painter.drawLine( s, s, s, s-self._history[-1] )
+        painter.end()
+
+    @staticmethod
+    def _glyph(text):
+        "Get cached pixmap of given text, centered in tray icon"
+        glyph = PercentTrayIcon.GLYPHS.get(text)
+        if glyph is None:
+            glyph = QPixmap(QSize(TRAY_ICON_SIZE,TRAY_ICON_SIZE))
+            glyph.fill( Qt.transparent )
+            painter = QPainter(glyph)
             painter.setPen(QColor("white"))
             painter.setFont( QFont("monospace",pointSize=7) )
-            painter.drawText( pixmap.rect(), Qt.AlignCenter|Qt.AlignVCenter, "{:0.0f}".format(y) )
+            painter.drawText( glyph.rect(), Qt.AlignCenter|Qt.AlignVCenter, text )
+            painter.end()
+            PercentTrayIcon.GLYPHS[text] = glyph
+        return glyph
+
+    @profiling.timed("PercentTrayIcon._render")
+    def _render(self):
+        "Render tray icon from bar graph and text, apply it to system tray when it changed"
+        shown = ( tuple(self._history), self._text )
+        if shown == self._shown:
+            return
+        self._shown = shown
+        pixmap = QPixmap(self._bars)
+        painter = QPainter(pixmap)
+        painter.drawPixmap( 0, 0, self._glyph(self._text) )
         painter.end() # disconnect painter from pixmap to be able to create icon from pixmap
         self.setIcon(QIcon(pixmap))
 